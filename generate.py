@@ -7,15 +7,45 @@ Works on 4GB VRAM (RTX 3050)
 import os
 import sys
 import subprocess
-import datetime
+import threading
 import argparse
+import glob
+import hashlib
+import io
+import json
 import random
+import re
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
 # Configuration
 DEFAULT_WIDTH = 768
 DEFAULT_HEIGHT = 512
 
+# Download tuning
+DOWNLOAD_CONNECTIONS = 4
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+PROGRESS_INTERVAL = 0.1  # Redraw the progress line at most 10 times a second
+
+# Smaller model files are leftovers of a failed download
+MIN_MODEL_SIZE = 1000000
+
+# Hugging Face reports the SHA-256 of LFS files in X-Linked-Etag
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Seed source, created once per process
+_rng = random.Random()
+
+# (prompt, size, seed) -> output path of earlier renders, loaded on first use
+_output_cache = None
+
+# Fixed part of the sd-cli command line, built once the files are found
+_sd_cli_command = None
+
 # URLs
 SD_CLI_URL = "https://github.com/leejet/stable-diffusion.cpp/releases/download/master-504-636d3cb/sd-master-636d3cb-bin-win-cuda12-x64.zip"
 CUDA_DLL_URL = "https://github.com/leejet/stable-diffusion.cpp/releases/download/master-504-636d3cb/cudart-sd-bin-win-cu12-x64.zip"
@@ -28,21 +58,41 @@ MODEL_URLS = {
 }
 
 
+@lru_cache(maxsize=1)
 def get_base_path():
     """Get installation directory."""
     if sys.platform == "win32":
-        return Path(os.environ.get("LOCALAPPDATA", "")) / "z-image-gen"
+        # An empty LOCALAPPDATA would otherwise resolve relative to the cwd
+        local_app_data = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+        return Path(local_app_data) / "z-image-gen"
     return Path.home() / ".local" / "z-image-gen"
 
 
+@lru_cache(maxsize=1)
 def get_downloads_folder():
-    """Get Windows Downloads folder."""
+    """Get Windows Downloads folder (resolved once per process)."""
+    override = os.environ.get("Z_IMAGE_OUTPUT_DIR")
+    if override:
+        return Path(override)
+    
     if sys.platform == "win32":
         try:
             import ctypes
+            import uuid
             from ctypes import wintypes
             
-            FOLDERID_Downloads = "{374DE290-123F-4565-9164-2C9AA0BAD945}"
+            class GUID(ctypes.Structure):
+                _fields_ = [
+                    ("Data1", ctypes.c_uint32),
+                    ("Data2", ctypes.c_uint16),
+                    ("Data3", ctypes.c_uint16),
+                    ("Data4", ctypes.c_uint8 * 8),
+                ]
+            
+            # The API takes a pointer to the GUID struct, not its string form
+            FOLDERID_Downloads = GUID.from_buffer_copy(
+                uuid.UUID("{374DE290-123F-4565-9164-2C9AA0BAD945}").bytes_le
+            )
             
             try:
                 ctypes.windll.ole32.CoInitialize(None)
@@ -51,7 +101,7 @@ def get_downloads_folder():
             
             SHGetKnownFolderPath = ctypes.windll.shell32.SHGetKnownFolderPath
             SHGetKnownFolderPath.argtypes = [
-                ctypes.c_wchar_p,
+                ctypes.POINTER(GUID),
                 wintypes.DWORD,
                 wintypes.HANDLE,
                 ctypes.POINTER(ctypes.c_wchar_p)
@@ -60,14 +110,18 @@ def get_downloads_folder():
             
             pszPath = ctypes.c_wchar_p()
             hr = SHGetKnownFolderPath(
-                ctypes.c_wchar_p(FOLDERID_Downloads),
+                ctypes.byref(FOLDERID_Downloads),
                 0,
                 None,
                 ctypes.byref(pszPath)
             )
             
-            if hr == 0 and pszPath.value:
-                return Path(pszPath.value)
+            try:
+                if hr == 0 and pszPath.value:
+                    return Path(pszPath.value)
+            finally:
+                # The shell allocates the string, the caller must free it
+                ctypes.windll.ole32.CoTaskMemFree(pszPath)
         except:
             pass
     
@@ -77,105 +131,614 @@ def get_downloads_folder():
     return Path.home()
 
 
-def download_file(url, dest, name="file"):
-    """Download a file with progress."""
+@lru_cache(maxsize=1)
+def get_session():
+    """Shared HTTP session, so repeated requests to a host reuse its connections."""
     import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def iter_raw(response):
+    """Read a streamed response body in 1 MiB blocks, bypassing iter_content."""
+    # Only decode when the server actually compressed the body
+    response.raw.decode_content = 'content-encoding' in response.headers
+    read = response.raw.read
+    while chunk := read(DOWNLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+def published_sha256(response):
+    """Return the SHA-256 a server published for a file, if any."""
+    for hop in (*response.history, response):
+        etag = hop.headers.get('x-linked-etag', '').strip('"').lower()
+        if SHA256_PATTERN.match(etag):
+            return etag
+    return None
+
+
+def check_sha256(dest, digest, expected, name):
+    """Compare a download's digest with the published one; remove the file on mismatch."""
+    if expected is None or digest == expected:
+        return True
+    print(f"\n  ERROR ({name}): checksum mismatch, removing corrupt file")
+    dest.unlink()
+    return False
+
+
+def resume_state_path(dest):
+    """File next to dest's partial downloads that records what they belong to."""
+    return dest.with_name(f"{dest.name}.part.json")
+
+
+def check_resume_state(dest, state):
+    """Keep partial files of dest only if they came from the same remote file.
+    
+    state describes the download (url, size, ETag, ranges); partial files
+    left by a download with a different state are deleted.
+    """
+    path = resume_state_path(dest)
+    try:
+        saved = json.loads(path.read_text())
+    except (OSError, ValueError):
+        saved = None
+    
+    if saved != state:
+        for part in dest.parent.glob(f"{glob.escape(dest.name)}.part*"):
+            part.unlink()
+        path.write_text(json.dumps(state))
+
+
+def if_range(etag):
+    """If-Range header that makes a server send the whole file if it changed."""
+    # Servers only honour If-Range with a strong validator
+    if etag and not etag.startswith('W/'):
+        return {'If-Range': etag}
+    return {}
+
+
+class DownloadProgress:
+    """Single progress line shared by one or more concurrent downloads."""
     
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = 0
+        self.total = 0
+        self.drawn_at = 0.0
+    
+    def add(self, total, done=0):
+        """Register a download's size and the bytes it already has on disk."""
+        with self.lock:
+            self.total += total
+            self.done += done
+    
+    def update(self, n):
+        """Count n more downloaded bytes and redraw the progress line."""
+        with self.lock:
+            self.done += n
+            now = time.monotonic()
+            if now - self.drawn_at < PROGRESS_INTERVAL and self.done < self.total:
+                return
+            self.drawn_at = now
+            if self.total > 0:
+                mb = self.done / (1024 * 1024)
+                total_mb = self.total / (1024 * 1024)
+                pct = (self.done / self.total) * 100
+                print(f"\r  Progress: {mb:.1f} / {total_mb:.1f} MB ({pct:.0f}%)", end="", flush=True)
+
+
+def download_file(url, dest, name="file", progress=None):
+    """Download a file with progress.
+    
+    Pass a shared DownloadProgress to report several concurrent downloads
+    on one line.
+    """
     print(f"\nDownloading {name}...")
     print(f"  URL: {url}")
     print(f"  To: {dest}")
     
     dest.parent.mkdir(parents=True, exist_ok=True)
     
+    if progress is None:
+        progress = DownloadProgress()
+    
+    # Split across parallel connections when the server supports ranges
+    expected = etag = None
+    total = 0
     try:
-        response = requests.get(url, stream=True, timeout=60)
-        response.raise_for_status()
+        head = get_session().head(url, allow_redirects=True, timeout=60)
+        head.raise_for_status()
+        expected = published_sha256(head)
+        etag = head.headers.get('etag')
+        total = int(head.headers.get('content-length', 0))
+        if total > 0 and head.headers.get('accept-ranges', '').lower() == 'bytes':
+            return download_file_parallel(
+                url, dest, total, progress=progress, name=name, expected_sha256=expected, etag=etag,
+            )
+    except Exception:
+        pass
+    
+    # Resume an interrupted download from the end of the partial file
+    part = dest.with_name(f"{dest.name}.part")
+    
+    try:
+        check_resume_state(dest, {'url': url, 'total': total, 'etag': etag})
+        resume_from = part.stat().st_size if part.exists() else 0
+        headers = {'Range': f'bytes={resume_from}-', **if_range(etag)} if resume_from else {}
         
-        total = int(response.headers.get('content-length', 0))
+        response = get_session().get(url, headers=headers, stream=True, timeout=60)
+        
+        # 416 means the part already holds the whole file, or no longer fits it
+        complete = (
+            resume_from and response.status_code == 416
+            and response.headers.get('content-range', '').rpartition('/')[2] == str(resume_from)
+        )
+        if resume_from and response.status_code == 416 and not complete:
+            response.close()
+            part.unlink()
+            resume_from = 0
+            response = get_session().get(url, stream=True, timeout=60)
+        if complete:
+            response.close()
+        else:
+            response.raise_for_status()
+        
+        total = 0 if complete else int(response.headers.get('content-length', 0))
         downloaded = 0
+        mode = 'wb'
+        
+        # 206 continues the partial file, 200 means the server restarted from zero
+        if complete or (resume_from and response.status_code == 206):
+            print(f"  Resuming {name} from {resume_from / (1024*1024):.1f} MB")
+            downloaded = resume_from
+            total += resume_from
+            mode = 'ab'
+        
+        progress.add(total, downloaded)
+        
+        # Hash while the bytes are in memory instead of re-reading the file
+        sha256 = hashlib.sha256()
+        if mode == 'ab':
+            with open(part, 'rb') as f:
+                while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                    sha256.update(chunk)
+        
+        with open(part, mode) as f:
+            for chunk in () if complete else iter_raw(response):
+                f.write(chunk)
+                sha256.update(chunk)
+                downloaded += len(chunk)
+                progress.update(len(chunk))
+        
+        part.replace(dest)
+        resume_state_path(dest).unlink(missing_ok=True)
+        if not check_sha256(dest, sha256.hexdigest(), expected, name):
+            return False
+        print(f"\n  Done: {name} ({downloaded / (1024*1024):.1f} MB)")
+        return True
+        
+    except Exception as e:
+        print(f"\n  ERROR ({name}): {e}")
+        return False
+
+
+class RemoteFile(io.RawIOBase):
+    """Seekable read-only view of a remote file, backed by HTTP Range requests.
+    
+    Sequential reads share one streamed response; a new request is only
+    made when the reader seeks elsewhere.
+    """
+    
+    def __init__(self, url):
+        self.url = url
+        self.pos = 0
+        self._response = None
+        self._response_pos = None
+        
+        head = get_session().head(url, allow_redirects=True, timeout=60)
+        head.raise_for_status()
+        if head.headers.get('accept-ranges', '').lower() != 'bytes':
+            raise OSError("server does not support Range requests")
+        self.size = int(head.headers.get('content-length', 0))
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self.pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.pos = max(0, offset)
+        return self.pos
+    
+    def readinto(self, buffer):
+        if self.pos >= self.size:
+            return 0
+        
+        if self._response is None or self._response_pos != self.pos:
+            self._close_response()
+            self._response = get_session().get(
+                self.url,
+                headers={'Range': f'bytes={self.pos}-'},
+                stream=True,
+                timeout=60,
+            )
+            self._response.raise_for_status()
+            if self._response.status_code != 206:
+                raise OSError("server ignored the Range request")
+            self._response_pos = self.pos
+        
+        n = self._response.raw.readinto(buffer)
+        self.pos += n
+        self._response_pos = self.pos
+        return n
+    
+    def _close_response(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+    
+    def close(self):
+        self._close_response()
+        super().close()
+
+
+def extract_zip(zf, dest_dir):
+    """Extract every entry of an open ZipFile, copying in 1 MiB blocks.
+    
+    Entries that would land outside dest_dir are rejected.
+    """
+    root = dest_dir.resolve()
+    for info in zf.infolist():
+        target = (root / info.filename).resolve()
+        if target != root and root not in target.parents:
+            raise zipfile.BadZipFile(f"unsafe path in archive: {info.filename}")
+        
+        if info.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+            continue
+        
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with zf.open(info) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+
+
+def open_zip(url, zip_path, name="archive"):
+    """Open a zip archive for extraction.
+    
+    The archive is read straight from the server when it supports Range
+    requests, so it is never written to disk. Otherwise it is downloaded
+    to zip_path first and removed when the archive is closed.
+    
+    Returns (ZipFile, close) where close() releases the archive, or None
+    if it could not be opened.
+    """
+    print(f"\nDownloading and extracting {name}...")
+    print(f"  URL: {url}")
+    
+    try:
+        remote = io.BufferedReader(RemoteFile(url), buffer_size=1024 * 1024)
+    except Exception:
+        remote = None
+    
+    if remote is None:
+        if not download_file(url, zip_path, name):
+            return None
+        source = zip_path
+    else:
+        source = remote
+    
+    def release():
+        if remote is not None:
+            remote.close()
+        elif zip_path.exists():
+            zip_path.unlink()
+    
+    try:
+        zf = zipfile.ZipFile(source, 'r')
+    except Exception as e:
+        print(f"  ERROR extracting: {e}")
+        release()
+        return None
+    
+    def close():
+        zf.close()
+        release()
+    
+    return zf, close
+
+
+def extract_opened(opened, dest_dir):
+    """Extract an archive returned by open_zip into dest_dir, then close it."""
+    zf, close = opened
+    try:
+        extract_zip(zf, dest_dir)
+        print("  Done!")
+        return True
+    except Exception as e:
+        print(f"  ERROR extracting: {e}")
+        return False
+    finally:
+        close()
+
+
+def install_zips(archives, dest_dir):
+    """Download several zip archives side by side and extract them into dest_dir.
+    
+    archives is a list of (url, zip_path, name). Archives are opened
+    concurrently; they are also extracted concurrently unless two of them
+    contain the same path, in which case they are extracted one at a time
+    in list order so the writes never race.
+    
+    Returns a list of booleans, one per archive.
+    """
+    with ThreadPoolExecutor(max_workers=len(archives)) as executor:
+        opened = list(executor.map(lambda archive: open_zip(*archive), archives))
+    
+    names = [set(o[0].namelist()) for o in opened if o is not None]
+    overlap = sum(map(len, names)) != len(set().union(*names))
+    
+    results = [False] * len(archives)
+    pending = [(i, o) for i, o in enumerate(opened) if o is not None]
+    if overlap or len(pending) < 2:
+        for i, o in pending:
+            results[i] = extract_opened(o, dest_dir)
+    else:
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [(i, executor.submit(extract_opened, o, dest_dir)) for i, o in pending]
+            for i, future in futures:
+                results[i] = future.result()
+    return results
+
+
+def preallocate(f, size):
+    """Reserve size bytes for an open file up front so it is laid out contiguously."""
+    try:
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(f.fileno(), 0, size)
+        elif size > 0:
+            f.seek(size - 1)
+            f.write(b'\0')
+            f.flush()
+            f.seek(0)
+    except OSError:
+        # Network and some FUSE filesystems do not support it
+        pass
+
+
+def copy_part(src, out, sha256=None):
+    """Append an open part file to out, in-kernel with sendfile where available."""
+    if sha256 is not None:
+        while chunk := src.read(DOWNLOAD_CHUNK_SIZE):
+            sha256.update(chunk)
+            out.write(chunk)
+        return
+    
+    # Only Linux sendfile writes to regular files; macOS and the BSDs need a socket
+    if not (sys.platform.startswith('linux') and hasattr(os, 'sendfile')):
+        shutil.copyfileobj(src, out, DOWNLOAD_CHUNK_SIZE)
+        return
+    
+    out.flush()
+    size = os.fstat(src.fileno()).st_size
+    sent = 0
+    while sent < size:
+        try:
+            n = os.sendfile(out.fileno(), src.fileno(), sent, size - sent)
+        except OSError:
+            if sent:
+                raise
+            # Not supported for these files (e.g. some FUSE mounts)
+            shutil.copyfileobj(src, out, DOWNLOAD_CHUNK_SIZE)
+            return
+        if n == 0:
+            break
+        sent += n
+    # sendfile moved the descriptor's offset; the file may be preallocated past it
+    out.seek(os.lseek(out.fileno(), 0, os.SEEK_CUR))
+
+
+def download_file_parallel(url, dest, total, num_chunks=DOWNLOAD_CONNECTIONS, progress=None, name="file",
+                           expected_sha256=None, etag=None):
+    """Download byte ranges of a file over parallel connections, then join them.
+    
+    Each range goes to its own .partN file, so an interrupted download
+    resumes every range from the size of its part file. The url, size and
+    ETag are kept in a .part.json file; parts of a different file are discarded.
+    """
+    if progress is None:
+        progress = DownloadProgress()
+    
+    step = -(-total // num_chunks)
+    ranges = [(start, min(start + step, total) - 1) for start in range(0, total, step)]
+    parts = [dest.with_name(f"{dest.name}.part{i}") for i in range(len(ranges))]
+    joining = dest.with_name(f"{dest.name}.joining")
+    
+    try:
+        check_resume_state(dest, {'url': url, 'total': total, 'etag': etag, 'chunks': len(ranges)})
+    except OSError as e:
+        print(f"\n  ERROR ({name}): {e}")
+        return False
+    
+    # Bytes already on disk from a previous run
+    done = []
+    for (start, end), part in zip(ranges, parts):
+        size = part.stat().st_size if part.exists() else 0
+        done.append(size if size <= end - start + 1 else 0)
+    
+    if sum(done):
+        print(f"  Resuming {name} from {sum(done) / (1024*1024):.1f} MB")
+    progress.add(total, sum(done))
+    
+    def fetch(start, end, part, offset):
+        if start + offset > end:
+            return
         
-        with open(dest, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=65536):
-                if chunk:
+        headers = {'Range': f'bytes={start + offset}-{end}', **if_range(etag)}
+        with get_session().get(url, headers=headers, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise OSError("server ignored the Range request")
+            
+            with open(part, 'ab' if offset else 'wb') as f:
+                for chunk in iter_raw(response):
                     f.write(chunk)
-                    downloaded += len(chunk)
-                    if total > 0:
-                        mb = downloaded / (1024 * 1024)
-                        total_mb = total / (1024 * 1024)
-                        pct = (downloaded / total) * 100
-                        print(f"\r  Progress: {mb:.1f} / {total_mb:.1f} MB ({pct:.0f}%)", end="", flush=True)
+                    progress.update(len(chunk))
+    
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(fetch, start, end, part, offset)
+                for (start, end), part, offset in zip(ranges, parts, done)
+            ]
+            for future in as_completed(futures):
+                future.result()
+        
+        # A range that closed early would leave a hole in the joined file
+        for (start, end), part in zip(ranges, parts):
+            size = part.stat().st_size
+            if size != end - start + 1:
+                raise OSError(f"{part.name} has {size} of {end - start + 1} bytes")
+        
+        # Join the parts in order; hash while copying only if there is a checksum to match
+        sha256 = hashlib.sha256() if expected_sha256 else None
+        with open(joining, 'wb') as out:
+            preallocate(out, total)
+            for part in parts:
+                with open(part, 'rb') as src:
+                    copy_part(src, out, sha256)
         
-        print(f"\n  Done! ({downloaded / (1024*1024):.1f} MB)")
+        if sha256 and not check_sha256(joining, sha256.hexdigest(), expected_sha256, name):
+            # The parts themselves are corrupt, so resuming from them cannot help
+            for part in parts:
+                part.unlink(missing_ok=True)
+            resume_state_path(dest).unlink(missing_ok=True)
+            return False
+        
+        # dest only ever appears complete; the parts stay until it does
+        os.replace(joining, dest)
+        for part in parts:
+            part.unlink()
+        resume_state_path(dest).unlink(missing_ok=True)
+        print(f"\n  Done: {name} ({total / (1024*1024):.1f} MB)")
         return True
         
     except Exception as e:
-        print(f"\n  ERROR: {e}")
+        print(f"\n  ERROR ({name}): {e}")
         return False
+    finally:
+        joining.unlink(missing_ok=True)
 
 
+@lru_cache(maxsize=1)
 def find_sd_cli(base):
-    """Find sd-cli.exe in the installation."""
+    """Find sd-cli.exe in the installation (cached; install() clears the cache).
+    
+    The location found is recorded in .sd_cli_path so later runs only
+    need a single stat.
+    """
     bin_dir = base / "bin"
+    record = base / ".sd_cli_path"
+    
+    # Where an earlier run found it
+    try:
+        p = base / record.read_text(encoding="utf-8").strip()
+        if p.is_file():
+            return p
+    except OSError:
+        pass
     
     # Expected locations
-    possible = [
+    found = None
+    for p in (
         bin_dir / "Release" / "sd-cli.exe",
         bin_dir / "sd-cli.exe",
         bin_dir / "build" / "bin" / "Release" / "sd-cli.exe",
-    ]
-    
-    for p in possible:
+    ):
         if p.exists():
-            return p
+            found = p
+            break
     
     # Search recursively
-    if bin_dir.exists():
-        for f in bin_dir.rglob("sd-cli.exe"):
-            return f
+    if found is None and bin_dir.exists():
+        found = next(bin_dir.rglob("sd-cli.exe"), None)
     
-    return None
+    if found is not None:
+        try:
+            record.write_text(str(found.relative_to(base)), encoding="utf-8")
+        except OSError:
+            pass
+    return found
 
 
-def check_installation():
-    """Check if all required files exist."""
+def scan_dir(path):
+    """List a directory in one pass; entries cache their stat on Windows."""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name: entry for entry in it}
+    except OSError:
+        return {}
+
+
+def check_installation(verbose=True):
+    """Check if all required files exist and the models are not truncated.
+    
+    With verbose=False nothing is printed, only the result is returned.
+    """
     base = get_base_path()
+    report = print if verbose else lambda *args: None
     
     sd_cli = find_sd_cli(base)
-    diffusion = base / "models" / "z_image_turbo-Q4_0.gguf"
-    vae = base / "models" / "ae.safetensors"
-    llm = base / "models" / "Qwen3-4B-Instruct-2507-Q4_K_M.gguf"
-    cudart = base / "bin" / "cudart_12.dll"
+    bin_files = scan_dir(base / "bin")
+    model_files = scan_dir(base / "models")
+    cudart = bin_files.get("cudart_12.dll")
     
-    print("\nChecking installation...")
+    report("\nChecking installation...")
     all_ok = True
     
     # Check sd-cli
     if sd_cli:
         size_mb = sd_cli.stat().st_size / (1024 * 1024)
-        print(f"  [OK] sd-cli.exe: {size_mb:.1f} MB ({sd_cli.relative_to(base)})")
+        report(f"  [OK] sd-cli.exe: {size_mb:.1f} MB ({sd_cli.relative_to(base)})")
     else:
-        print(f"  [MISSING] sd-cli.exe")
+        report(f"  [MISSING] sd-cli.exe")
         all_ok = False
     
     # Check CUDA runtime
-    if cudart.exists():
+    if cudart is not None:
         size_mb = cudart.stat().st_size / (1024 * 1024)
-        print(f"  [OK] CUDA runtime: {size_mb:.1f} MB")
+        report(f"  [OK] CUDA runtime: {size_mb:.1f} MB")
     else:
-        print(f"  [MISSING] cudart_12.dll - run with --install")
+        report(f"  [MISSING] cudart_12.dll - run with --install")
         all_ok = False
     
     # Check models
-    for name, path in [
-        ("diffusion model", diffusion),
-        ("VAE", vae),
-        ("LLM/text encoder", llm),
+    for name, filename in [
+        ("diffusion model", "z_image_turbo-Q4_0.gguf"),
+        ("VAE", "ae.safetensors"),
+        ("LLM/text encoder", "Qwen3-4B-Instruct-2507-Q4_K_M.gguf"),
     ]:
-        if path.exists():
-            size_mb = path.stat().st_size / (1024 * 1024)
-            print(f"  [OK] {name}: {size_mb:.1f} MB")
+        entry = model_files.get(filename)
+        size = entry.stat().st_size if entry is not None else 0
+        if size > MIN_MODEL_SIZE:
+            report(f"  [OK] {name}: {size / (1024 * 1024):.1f} MB")
+        elif entry is not None:
+            report(f"  [INCOMPLETE] {name}: {size} bytes - run with --install")
+            all_ok = False
         else:
-            print(f"  [MISSING] {name}")
+            report(f"  [MISSING] {name}")
             all_ok = False
     
     return all_ok
@@ -183,9 +746,6 @@ def check_installation():
 
 def install():
     """Download and install all required files."""
-    import requests
-    import zipfile
-    
     base = get_base_path()
     bin_dir = base / "bin"
     models_dir = base / "models"
@@ -197,26 +757,39 @@ def install():
     print("Z-Image Generator - Installation")
     print("=" * 60)
     
-    # Download sd-cli
+    # A complete install has nothing to download or re-check
+    find_sd_cli.cache_clear()
+    if check_installation(verbose=False):
+        print("\nAll files are already installed.")
+        return True
+    
+    # The sd-cli and CUDA archives are independent, fetch them side by side
+    archives = []
+    
     sd_cli = find_sd_cli(base)
     if not sd_cli:
         print("\n[1/5] Downloading sd-cli (CUDA 12 for Windows)...")
-        zip_path = base / "sd-cli.zip"
-
-        if not download_file(SD_CLI_URL, zip_path, "stable-diffusion.cpp"):
-            print("Failed to download sd-cli!")
-            return False
+        archives.append((SD_CLI_URL, base / "sd-cli.zip", "stable-diffusion.cpp", "Failed to download sd-cli!"))
+    else:
+        print(f"\n[1/5] sd-cli.exe already exists")
 
-        print("\nExtracting...")
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                zf.extractall(bin_dir)
-            zip_path.unlink()
-            print("  Done!")
-        except Exception as e:
-            print(f"  ERROR extracting: {e}")
+    cudart_dll = bin_dir / "cudart_12.dll"
+    if not cudart_dll.exists():
+        print("\n[2/5] Downloading CUDA runtime DLLs...")
+        archives.append((CUDA_DLL_URL, base / "cuda-dlls.zip", "CUDA runtime", "Failed to download CUDA DLLs!"))
+    else:
+        print(f"\n[2/5] CUDA runtime DLLs already exist")
+    
+    if archives:
+        results = install_zips([archive[:3] for archive in archives], bin_dir)
+        failed = [archive[3] for archive, ok in zip(archives, results) if not ok]
+        for error in failed:
+            print(error)
+        if failed:
             return False
-
+    
+    if not sd_cli:
+        find_sd_cli.cache_clear()
         sd_cli = find_sd_cli(base)
         if sd_cli:
             print(f"  Found sd-cli.exe at: {sd_cli.relative_to(base)}")
@@ -225,30 +798,6 @@ def install():
             for f in bin_dir.rglob("*"):
                 if f.is_file():
                     print(f"    {f.relative_to(bin_dir)}")
-    else:
-        print(f"\n[1/5] sd-cli.exe already exists")
-
-    # Download CUDA runtime DLLs
-    cudart_dll = bin_dir / "cudart_12.dll"
-    if not cudart_dll.exists():
-        print("\n[2/5] Downloading CUDA runtime DLLs...")
-        cuda_zip = base / "cuda-dlls.zip"
-
-        if not download_file(CUDA_DLL_URL, cuda_zip, "CUDA runtime"):
-            print("Failed to download CUDA DLLs!")
-            return False
-
-        print("\nExtracting CUDA DLLs...")
-        try:
-            with zipfile.ZipFile(cuda_zip, 'r') as zf:
-                zf.extractall(bin_dir)
-            cuda_zip.unlink()
-            print("  Done!")
-        except Exception as e:
-            print(f"  ERROR extracting CUDA DLLs: {e}")
-            return False
-    else:
-        print(f"\n[2/5] CUDA runtime DLLs already exist")
     
     # Download models
     models = [
@@ -257,16 +806,33 @@ def install():
         ("LLM/text encoder", MODEL_URLS["llm"], "Qwen3-4B-Instruct-2507-Q4_K_M.gguf"),
     ]
 
+    pending = []
     for i, (name, url, filename) in enumerate(models, 3):
         dest = models_dir / filename
 
-        if dest.exists() and dest.stat().st_size > 1000000:
-            size_mb = dest.stat().st_size / (1024 * 1024)
+        try:
+            size = dest.stat().st_size
+        except OSError:
+            size = 0
+
+        if size > MIN_MODEL_SIZE:
+            size_mb = size / (1024 * 1024)
             print(f"\n[{i}/5] {name} already exists ({size_mb:.0f} MB)")
         else:
-            print(f"\n[{i}/5] Downloading {name}...")
-            if not download_file(url, dest, name):
-                print(f"  WARNING: Failed to download {name}")
+            print(f"\n[{i}/5] Queued {name}")
+            pending.append((name, url, dest))
+
+    # Download the missing models concurrently, reporting on one line
+    if pending:
+        progress = DownloadProgress()
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {
+                executor.submit(download_file, url, dest, name, progress): name
+                for name, url, dest in pending
+            }
+            for future in as_completed(futures):
+                if not future.result():
+                    print(f"  WARNING: Failed to download {futures[future]}")
     
     print("\n" + "=" * 60)
     print("Installation complete!")
@@ -276,8 +842,42 @@ def install():
     return True
 
 
-def generate(prompt, output_path=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, seed=-1, return_path=False):
-    """Generate an image using sd-cli.exe."""
+def get_output_cache():
+    """Load the record of earlier renders from cache.json (once per process)."""
+    global _output_cache
+    if _output_cache is None:
+        try:
+            _output_cache = json.loads((get_base_path() / "cache.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _output_cache = {}
+    return _output_cache
+
+
+def output_cache_key(prompt, width, height, seed):
+    """Key identifying a render; only meaningful for a fixed seed."""
+    return hashlib.blake2b(f"{prompt}|{width}|{height}|{seed}".encode(), digest_size=16).hexdigest()
+
+
+def remember_output(key, output_path):
+    """Record a finished render so the same request can reuse it."""
+    cache = get_output_cache()
+    cache[key] = str(output_path)
+    try:
+        (get_base_path() / "cache.json").write_text(json.dumps(cache), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def get_sd_cli_command():
+    """Check sd-cli and the models exist, and build the fixed part of the command.
+    
+    The result is kept for the rest of the session; None is returned
+    (and not kept) while something is missing.
+    """
+    global _sd_cli_command
+    if _sd_cli_command is not None:
+        return _sd_cli_command
+    
     base = get_base_path()
     models_dir = base / "models"
     
@@ -289,26 +889,63 @@ def generate(prompt, output_path=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGH
     # Check files exist
     if not sd_cli:
         print("ERROR: sd-cli.exe not found. Run with --install first.")
-        return False
+        return None
     
     if not diffusion.exists():
         print(f"ERROR: Diffusion model not found: {diffusion}")
-        return False
+        return None
     
     if not vae.exists():
         print(f"ERROR: VAE not found: {vae}")
-        return False
+        return None
     
     if not llm.exists():
         print(f"ERROR: LLM not found: {llm}")
+        return None
+    
+    # Optimized for 4GB VRAM
+    _sd_cli_command = [
+        str(sd_cli),
+        "--diffusion-model", str(diffusion),
+        "--vae", str(vae),
+        "--llm", str(llm),
+        "--cfg-scale", "1.0",
+        "--offload-to-cpu",
+        "--diffusion-fa",
+        "--vae-tiling",
+        "--clip-on-cpu",
+    ]
+    return _sd_cli_command
+
+
+def generate(prompt, output_path=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, seed=-1, return_path=False):
+    """Generate an image using sd-cli.exe."""
+    command = get_sd_cli_command()
+    if command is None:
+        if return_path:
+            return False, None
         return False
     
+    # A fixed seed renders the same image every time, reuse an earlier one
+    key = output_cache_key(prompt, width, height, seed) if seed >= 0 else None
+    cached = get_output_cache().get(key) if key else None
+    if cached and Path(cached).exists():
+        cached = Path(cached)
+        if output_path is not None and Path(output_path) != cached:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            cached = Path(shutil.copyfile(cached, output_path))
+        print(f"\n[OK] Same prompt, size and seed as an earlier image")
+        print(f"Saved to: {cached}")
+        if return_path:
+            return True, cached
+        return True
+    
     # Output path
     if output_path is None:
         downloads = get_downloads_folder()
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         if seed < 0:
-            seed = random.randint(0, 999999)
+            seed = _rng.randrange(1_000_000)
         output_path = downloads / f"zimage_{seed}_{timestamp}.png"
     else:
         output_path = Path(output_path)
@@ -322,18 +959,10 @@ def generate(prompt, output_path=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGH
     print(f"  Output: {output_path}")
     print()
     
-    # Build command - optimized for 4GB VRAM
+    # Only the per-image arguments change between calls
     cmd = [
-        str(sd_cli),
-        "--diffusion-model", str(diffusion),
-        "--vae", str(vae),
-        "--llm", str(llm),
+        *command,
         "-p", prompt,
-        "--cfg-scale", "1.0",
-        "--offload-to-cpu",
-        "--diffusion-fa",
-        "--vae-tiling",
-        "--clip-on-cpu",
         "-W", str(width),
         "-H", str(height),
         "-o", str(output_path),
@@ -342,15 +971,17 @@ def generate(prompt, output_path=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGH
     if seed >= 0:
         cmd.extend(["--seed", str(seed)])
     
-    start = datetime.datetime.now()
+    start = time.perf_counter()
     
     try:
         print("Running sd-cli...")
-        result = subprocess.run(cmd, cwd=str(sd_cli.parent))
+        result = subprocess.run(cmd, cwd=os.path.dirname(command[0]))
         
-        elapsed = (datetime.datetime.now() - start).total_seconds()
+        elapsed = time.perf_counter() - start
         
         if output_path.exists():
+            if key:
+                remember_output(key, output_path)
             print(f"\n[OK] Generated in {elapsed:.1f}s")
             print(f"Saved to: {output_path}")
             if return_path:
@@ -369,18 +1000,30 @@ def generate(prompt, output_path=None, width=DEFAULT_WIDTH, height=DEFAULT_HEIGH
         return False
 
 
+INTERACTIVE_HELP = """
+Commands:
+  <prompt>    - Generate image from text
+  size WxH    - Change size (e.g., size 1024x576)
+  check       - Check installation
+  help        - Show this help
+  quit/exit   - Exit program"""
+
+SIZE_COMMAND = re.compile(r'^\s*size\s+(\d+)\s*x\s*(\d+)\s*$', re.I)
+
+# Interactive commands that do not change the session state
+INTERACTIVE_COMMANDS = {
+    'help': lambda: print(INTERACTIVE_HELP),
+    'check': check_installation,
+}
+
+
 def interactive_mode(width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
     """Interactive mode - generate images in a loop."""
     print("\n" + "=" * 60)
     print("  Z-Image Generator - Interactive Mode")
     print("=" * 60)
     print(f"\nImage size: {width}x{height}")
-    print("\nCommands:")
-    print("  <prompt>    - Generate image from text")
-    print("  size WxH    - Change size (e.g., size 1024x576)")
-    print("  check       - Check installation")
-    print("  help        - Show this help")
-    print("  quit/exit   - Exit program")
+    print(INTERACTIVE_HELP)
     print("\nImages are saved to your Downloads folder.")
     print("-" * 60)
     
@@ -399,35 +1042,22 @@ def interactive_mode(width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
             continue
         
         # Commands
-        if prompt.lower() in ('quit', 'exit', 'q'):
+        command = prompt.lower()
+        if command in ('quit', 'exit', 'q'):
             print(f"\nGenerated {generated_count} image(s). Goodbye!")
             break
         
-        if prompt.lower() == 'help':
-            print("\nCommands:")
-            print("  <prompt>    - Generate image from text")
-            print("  size WxH    - Change size (e.g., size 1024x576)")
-            print("  check       - Check installation")
-            print("  help        - Show this help")
-            print("  quit/exit   - Exit program")
+        if command in INTERACTIVE_COMMANDS:
+            INTERACTIVE_COMMANDS[command]()
             continue
         
-        if prompt.lower() == 'check':
-            check_installation()
-            continue
-        
-        if prompt.lower().startswith('size '):
-            try:
-                size_part = prompt[5:].strip().lower()
-                if 'x' in size_part:
-                    w, h = size_part.split('x')
-                    width = int(w.strip())
-                    height = int(h.strip())
-                    print(f"Size changed to {width}x{height}")
-                else:
-                    print("Usage: size 1024x576")
-            except:
-                print("Invalid size. Usage: size 1024x576")
+        if command.startswith('size '):
+            match = SIZE_COMMAND.match(prompt)
+            if match:
+                width, height = int(match[1]), int(match[2])
+                print(f"Size changed to {width}x{height}")
+            else:
+                print("Usage: size 1024x576")
             continue
         
         # Generate image
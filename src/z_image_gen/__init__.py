@@ -8,7 +8,15 @@ with stable-diffusion.cpp backend.
 __version__ = "1.0.0"
 __author__ = "FedoRScorpioN"
 
-from z_image_gen.core.generator import ZImageGenerator
-from z_image_gen.core.model import ModelManager
-
 __all__ = ["ZImageGenerator", "ModelManager", "__version__"]
+
+
+def __getattr__(name):
+    """Import the generation stack on first use, not on `import z_image_gen`"""
+    if name == "ZImageGenerator":
+        from z_image_gen.core.generator import ZImageGenerator
+        return ZImageGenerator
+    if name == "ModelManager":
+        from z_image_gen.core.model import ModelManager
+        return ModelManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
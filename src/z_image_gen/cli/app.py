@@ -3,28 +3,32 @@ CLI application for z-image-gen
 """
 
 import argparse
+import random
 import sys
-import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt
-from rich.text import Text
+from typing import Optional, TYPE_CHECKING
 
 from z_image_gen import __version__
-from z_image_gen.core.generator import ZImageGenerator, GenerationError
-from z_image_gen.core.model import ModelManager, DownloadError
+from z_image_gen.core.model import MODELS, DEFAULT_MODEL
 from z_image_gen.config.settings import Settings
 from z_image_gen.config.paths import get_downloads_folder, get_model_cache_path
+from z_image_gen.utils.console import get_console
+from z_image_gen.utils.gpu import get_gpu_info
+from z_image_gen.utils.image import IMAGE_FORMATS
 
-console = Console()
+# The generation stack and rich are imported where they are used,
+# so --help and --version do not pay for them
+if TYPE_CHECKING:
+    from z_image_gen.core.generator import ZImageGenerator
+    from z_image_gen.core.model import ModelManager
 
+# Seed source for batches, created once per process
+_rng = random.Random()
 
-def print_banner():
-    """Print the application banner"""
-    banner = """
+
+# Formatted once at import
+BANNER = """
     ╔═══════════════════════════════════════════════════════════════╗
     ║                                                               ║
     ║     ██╗███████╗    ███████╗███████╗ ██████╗ ██████╗ ██████╗   ║
@@ -38,135 +42,247 @@ def print_banner():
     ║          Optimized for 4GB VRAM                               ║
     ╚═══════════════════════════════════════════════════════════════╝
     """.format(__version__)
-    
-    console.print(banner, style="bold blue")
+
+
+def print_banner():
+    """Print the application banner"""
+    get_console().print(BANNER, style="bold blue")
 
 
 def print_system_info():
     """Print system information"""
-    from z_image_gen.config.paths import get_model_cache_path
-    
+    console = get_console()
     console.print("\n[bold]System Information:[/bold]")
     console.print(f"  Model cache: {get_model_cache_path()}")
     console.print(f"  Output dir:  {get_downloads_folder()}")
     
     # Check for CUDA
+    gpu = get_gpu_info()
+    if gpu is not None:
+        console.print(f"  GPU:         {gpu['name']}")
+        console.print(f"  VRAM:        {gpu['vram_gb']:.1f} GB")
+    else:
+        console.print("  GPU:         [yellow]NVIDIA GPU not detected[/yellow]")
+
+
+def create_generator(settings: Settings) -> Optional["ZImageGenerator"]:
+    """
+    Create a generator whose model stays loaded across prompts.
+    
+    Args:
+        settings: Generation settings
+    
+    Returns:
+        ZImageGenerator instance, or None if the model is unavailable
+    """
+    from z_image_gen.core.generator import ZImageGenerator
+    from z_image_gen.core.model import DownloadError
+    
     try:
-        import torch
-        if torch.cuda.is_available():
-            console.print(f"  GPU:         {torch.cuda.get_device_name(0)}")
-            console.print(f"  VRAM:        {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
-        else:
-            console.print("  GPU:         [yellow]CUDA not available[/yellow]")
-    except ImportError:
-        console.print("  GPU:         [dim]PyTorch not installed[/dim]")
+        return ZImageGenerator(
+            model_type=settings.model_type,
+            settings=settings,
+        )
+    except DownloadError as e:
+        get_console().print(f"[red]Download error: {e}[/red]")
+        return None
+
+
+def describe_request(
+    prompt: str,
+    seed: int,
+    settings: Settings,
+    negative_prompt: str = "",
+    image_format: Optional[str] = None,
+) -> str:
+    """Describe everything that determines an image, for its metadata"""
+    return (
+        f"{prompt}|negative={negative_prompt}|seed={seed}"
+        f"|{settings.width}x{settings.height}|steps={settings.steps}"
+        f"|model={settings.model_type}|format={image_format or settings.image_format}"
+    )
 
 
 def generate_image(
+    generator: "ZImageGenerator",
     prompt: str,
     settings: Settings,
     seed: int = -1,
     output: Optional[Path] = None,
+    negative_prompt: str = "",
 ) -> Path:
     """
     Generate and save an image.
     
     Args:
+        generator: Generator to reuse (model is loaded once per session)
         prompt: Text prompt
         settings: Generation settings
         seed: Random seed (-1 for random)
         output: Output path (auto-generated if None)
+        negative_prompt: Things to avoid in the image
     
     Returns:
         Path to saved image
     """
-    try:
-        with ZImageGenerator(
-            model_type=settings.model_type,
-            settings=settings,
-        ) as generator:
-            # Generate
-            image = generator.generate(
-                prompt=prompt,
-                width=settings.width,
-                height=settings.height,
-                steps=settings.steps,
-                seed=seed,
-            )
-            
-            if image is None:
-                console.print("[red]Failed to generate image[/red]")
-                return None
-            
-            # Determine output path
-            if output is None:
-                output = settings.get_output_path(seed=seed)
-            
-            # Save image
-            image.save(output)
-            console.print(f"\n[bold green]✓ Image saved![/bold green]")
-            console.print(f"  Path: {output}")
-            console.print(f"  Size: {settings.width}x{settings.height}")
-            
+    from z_image_gen.core.generator import GenerationError
+    from z_image_gen.utils.image import save_image, read_parameters
+    
+    console = get_console()
+    
+    # Same request as the file already there: nothing to do. Only PNGs
+    # carry the stored parameters, anything without them is rendered again.
+    image_format = output.suffix.lstrip(".").lower() if output is not None else None
+    parameters = describe_request(prompt, seed, settings, negative_prompt, image_format)
+    if settings.skip_existing and output is not None and output.exists():
+        if read_parameters(output) == parameters:
+            console.print(f"[dim]Already exists, skipping: {output}[/dim]")
             return output
-            
+    
+    try:
+        # Generate
+        image = generator.generate(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            width=settings.width,
+            height=settings.height,
+            steps=settings.steps,
+            seed=seed,
+        )
+        
+        if image is None:
+            console.print("[red]Failed to generate image[/red]")
+            return None
+        
+        # Determine output path
+        if output is None:
+            output = settings.get_output_path(seed=seed)
+        
+        # Save image
+        save_image(
+            image,
+            output,
+            png_compress_level=settings.png_compress_level,
+            parameters=parameters if settings.save_metadata else None,
+        )
+        console.print(f"\n[bold green]✓ Image saved![/bold green]")
+        console.print(f"  Path: {output}")
+        console.print(f"  Size: {settings.width}x{settings.height}")
+        
+        return output
+        
     except GenerationError as e:
         console.print(f"[red]Generation error: {e}[/red]")
         return None
-    except DownloadError as e:
-        console.print(f"[red]Download error: {e}[/red]")
-        return None
 
 
 def interactive_mode(settings: Settings):
     """Run in interactive mode"""
+    from rich.prompt import Prompt
+    
+    console = get_console()
     print_banner()
     print_system_info()
     
     console.print("\n[bold]Interactive Mode[/bold]")
     console.print("Enter prompts to generate images. Type 'quit' to exit.\n")
     
+    generator = create_generator(settings)
+    if generator is None:
+        return
+    
     count = 0
     
-    while True:
-        try:
-            prompt = Prompt.ask("\n[cyan]Prompt[/cyan] (or 'quit')").strip()
-            
-            if prompt.lower() in ('quit', 'exit', 'q'):
+    # Keep the model loaded for the whole session
+    with generator:
+        while True:
+            try:
+                prompt = Prompt.ask("\n[cyan]Prompt[/cyan] (or 'quit')").strip()
+                
+                if prompt.lower() in ('quit', 'exit', 'q'):
+                    break
+                
+                if not prompt:
+                    console.print("[yellow]Please enter a prompt.[/yellow]")
+                    continue
+                
+                # Generate with random seed
+                output = generate_image(generator, prompt, settings, seed=-1)
+                
+                if output:
+                    count += 1
+                
+            except KeyboardInterrupt:
+                console.print("\n[yellow]Interrupted.[/yellow]")
                 break
-            
+            except Exception as e:
+                console.print(f"[red]Error: {e}[/red]")
+    
+    console.print(f"\n[bold]Session ended.[/bold] Generated {count} image(s).")
+
+
+def serve_mode(settings: Settings) -> int:
+    """
+    Read prompts from stdin, one per line, against a persistent model.
+    
+    stdout carries exactly one line per prompt so the session can be
+    driven by another process: the path of the saved image, or
+    "error: <message>" if that prompt failed. Status output goes to stderr.
+    """
+    console = get_console()
+    # Keep stdout for the line protocol only
+    console.stderr = True
+    
+    generator = create_generator(settings)
+    if generator is None:
+        return 1
+    
+    failures = 0
+    
+    with generator:
+        for line in sys.stdin:
+            prompt = line.strip()
             if not prompt:
-                console.print("[yellow]Please enter a prompt.[/yellow]")
                 continue
+            if prompt.lower() in ('quit', 'exit', 'q'):
+                break
             
-            # Generate with random seed
-            output = generate_image(prompt, settings, seed=-1)
+            # One bad prompt must not end the session
+            try:
+                output = generate_image(generator, prompt, settings, seed=-1)
+                error = None if output else "generation failed"
+            except Exception as e:
+                output, error = None, " ".join(str(e).split()) or type(e).__name__
+                console.print(f"[red]Error: {error}[/red]")
             
             if output:
-                count += 1
-            
-        except KeyboardInterrupt:
-            console.print("\n[yellow]Interrupted.[/yellow]")
-            break
-        except Exception as e:
-            console.print(f"[red]Error: {e}[/red]")
+                print(output, flush=True)
+            else:
+                failures += 1
+                print(f"error: {error}", flush=True)
     
-    console.print(f"\n[bold]Session ended.[/bold] Generated {count} image(s).")
+    return 0 if failures == 0 else 1
 
 
-def main():
-    """Main entry point"""
-    parser = argparse.ArgumentParser(
-        prog="z-image-gen",
-        description="Local AI image generation with Z-Image model",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+EPILOG = """
 Examples:
   z-image-gen "a beautiful sunset over mountains"
   z-image-gen "cyberpunk city" --width 1024 --height 576
   z-image-gen "cat" --seed 42 --output ./my_image.png
+  z-image-gen "cat" --batch 4
   z-image-gen --interactive
-        """,
+  z-image-gen --serve < prompts.txt
+        """
+
+
+@lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser (once per process)"""
+    parser = argparse.ArgumentParser(
+        prog="z-image-gen",
+        description="Local AI image generation with Z-Image model",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=EPILOG,
     )
     
     # Positional argument for prompt
@@ -201,11 +317,28 @@ Examples:
         default=-1,
         help="Random seed (-1 for random)",
     )
+    parser.add_argument(
+        "-n", "--batch",
+        type=int,
+        default=1,
+        help="Number of images to generate with the loaded model (default: 1)",
+    )
+    parser.add_argument(
+        "-t", "--threads",
+        type=int,
+        default=-1,
+        help="CPU threads for offloaded work (default: auto)",
+    )
+    parser.add_argument(
+        "--no-warmup",
+        action="store_true",
+        help="Skip the warm-up generation after loading the model",
+    )
     parser.add_argument(
         "-m", "--model",
-        choices=["q4_0", "q5_0", "q8_0"],
-        default="q4_0",
-        help="Model quantization (default: q4_0 for 4GB VRAM)",
+        choices=list(MODELS),
+        default=DEFAULT_MODEL,
+        help=f"Model quantization (default: {DEFAULT_MODEL} for 4GB VRAM)",
     )
     
     # Output options
@@ -219,6 +352,17 @@ Examples:
         type=Path,
         help="Output directory (default: Downloads)",
     )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Keep --output if it is a PNG saved from the same prompt, seed and settings",
+    )
+    parser.add_argument(
+        "-f", "--format",
+        choices=list(IMAGE_FORMATS),
+        default="png",
+        help="Image format for auto-named files (default: png)",
+    )
     
     # Mode options
     parser.add_argument(
@@ -226,6 +370,11 @@ Examples:
         action="store_true",
         help="Run in interactive mode",
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the model loaded and read prompts from stdin",
+    )
     
     # Utility commands
     parser.add_argument(
@@ -233,6 +382,11 @@ Examples:
         action="store_true",
         help="Download model without generating",
     )
+    parser.add_argument(
+        "--verify-model",
+        action="store_true",
+        help="Check the integrity of downloaded models and re-download corrupt ones",
+    )
     parser.add_argument(
         "--info",
         action="store_true",
@@ -249,55 +403,176 @@ Examples:
         version=f"z-image-gen {__version__}",
     )
     
-    args = parser.parse_args()
-    
-    # Utility commands
-    if args.list_models:
-        console.print("\n[bold]Available Models:[/bold]\n")
-        for model in ModelManager.list_available_models():
-            console.print(f"  [cyan]{model['type']}[/cyan]: {model['name']}")
-            console.print(f"    Size: {model['size_gb']:.2f} GB")
-            console.print(f"    Recommended VRAM: {model['recommended_vram']}")
-        return 0
-    
-    if args.info:
-        print_banner()
-        print_system_info()
-        return 0
-    
-    if args.download_model:
-        print_banner()
-        manager = ModelManager(args.model)
-        if manager.is_downloaded():
-            console.print(f"[green]Model already downloaded: {manager.model_path}[/green]")
-        else:
-            manager.download()
-        return 0
-    
-    # Create settings
-    settings = Settings(
+    return parser
+
+
+def settings_from_args(args: argparse.Namespace) -> Settings:
+    """Build generation settings from parsed arguments"""
+    return Settings(
         model_type=args.model,
         width=args.width,
         height=args.height,
         steps=args.steps,
         output_dir=args.output_dir,
+        image_format=args.format,
+        threads=args.threads,
+        warmup=not args.no_warmup,
+        skip_existing=args.skip_existing,
     )
+
+
+def download_model(manager: "ModelManager") -> bool:
+    """
+    Download a model, reporting failures instead of raising.
+    
+    Args:
+        manager: ModelManager of the model to download
+    
+    Returns:
+        True if the download completed
+    """
+    import requests
+    from z_image_gen.core.model import DownloadError
+    
+    try:
+        manager.download()
+        return True
+    except (DownloadError, requests.RequestException) as e:
+        get_console().print(f"[red]Download error: {e}[/red]")
+    except KeyboardInterrupt:
+        # download() has already said whether it can be resumed
+        pass
+    return False
+
+
+def run_list_models(args: argparse.Namespace) -> int:
+    """Handle --list-models"""
+    from z_image_gen.core.model import ModelManager
     
-    # Interactive mode
-    if args.interactive:
-        interactive_mode(settings)
+    console = get_console()
+    console.print("\n[bold]Available Models:[/bold]\n")
+    for model in ModelManager.list_available_models():
+        console.print(f"  [cyan]{model['type']}[/cyan]: {model['name']}")
+        console.print(f"    Size: {model['size_gb']:.2f} GB")
+        console.print(f"    Recommended VRAM: {model['recommended_vram']}")
+    return 0
+
+
+def run_info(args: argparse.Namespace) -> int:
+    """Handle --info"""
+    print_banner()
+    print_system_info()
+    return 0
+
+
+def run_download_model(args: argparse.Namespace) -> int:
+    """Handle --download-model"""
+    from z_image_gen.core.model import ModelManager
+    
+    print_banner()
+    manager = ModelManager(args.model)
+    if manager.is_downloaded():
+        get_console().print(f"[green]Model already downloaded: {manager.model_path}[/green]")
         return 0
+    return 0 if download_model(manager) else 1
+
+
+def run_verify_model(args: argparse.Namespace) -> int:
+    """Handle --verify-model: check the selected and every downloaded model at once"""
+    from z_image_gen.core.model import ModelManager, verify_many
     
-    # Single prompt mode
-    if args.prompt:
-        print_banner()
-        output = generate_image(
-            prompt=args.prompt,
-            settings=settings,
-            seed=args.seed,
-            output=args.output,
-        )
-        return 0 if output else 1
+    console = get_console()
+    managers = [
+        manager for manager in map(ModelManager, MODELS)
+        if manager.model_type == args.model or manager.is_downloaded()
+    ]
+    
+    failures = 0
+    for manager, valid in zip(managers, verify_many(managers, force=True)):
+        if valid:
+            console.print(f"[green]✓ Model is valid: {manager.model_path}[/green]")
+            continue
+        
+        console.print(f"[yellow]{manager.model_info.name} is missing or corrupt, downloading again...[/yellow]")
+        manager.delete()
+        if not (download_model(manager) and manager.verify()):
+            failures += 1
+    
+    return 0 if failures == 0 else 1
+
+
+def run_interactive(args: argparse.Namespace) -> int:
+    """Handle --interactive"""
+    interactive_mode(settings_from_args(args))
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    """Handle --serve"""
+    return serve_mode(settings_from_args(args))
+
+
+def run_prompt(args: argparse.Namespace) -> int:
+    """Generate --batch images for the prompt given on the command line"""
+    settings = settings_from_args(args)
+    
+    print_banner()
+    generator = create_generator(settings)
+    if generator is None:
+        return 1
+    
+    # Consecutive seeds keep batch images distinct and reproducible
+    base_seed = args.seed
+    if args.batch > 1 and base_seed < 0:
+        base_seed = _rng.randrange(1_000_000)
+    
+    failures = 0
+    with generator:
+        for i in range(args.batch):
+            output = args.output
+            if output is not None and args.batch > 1:
+                output = output.with_stem(f"{output.stem}_{i + 1}")
+            
+            if args.batch > 1:
+                get_console().print(f"\n[cyan]Image {i + 1}/{args.batch}[/cyan]")
+            
+            saved = generate_image(
+                generator,
+                prompt=args.prompt,
+                settings=settings,
+                seed=base_seed + i if base_seed >= 0 else -1,
+                output=output,
+            )
+            if not saved:
+                failures += 1
+    return 0 if failures == 0 else 1
+
+
+# Mode flags in priority order; the first one set picks the handler
+COMMANDS = {
+    "list_models": run_list_models,
+    "info": run_info,
+    "download_model": run_download_model,
+    "verify_model": run_verify_model,
+    "interactive": run_interactive,
+    "serve": run_serve,
+    "prompt": run_prompt,
+}
+
+
+def main():
+    """Main entry point"""
+    # Answer a bare --version without building the parser
+    if sys.argv[1:] == ["--version"]:
+        print(f"z-image-gen {__version__}")
+        return 0
+    
+    parser = build_parser()
+    args = parser.parse_args()
+    
+    for flag, handler in COMMANDS.items():
+        if getattr(args, flag):
+            return handler(args)
     
     # No prompt provided
     parser.print_help()
@@ -1,5 +1,5 @@
 """Config module initialization"""
-from z_image_gen.config.settings import Settings, DEFAULT_SETTINGS
+from z_image_gen.config.settings import Settings, get_default_settings
 from z_image_gen.config.paths import (
     get_downloads_folder,
     get_model_cache_path,
@@ -10,8 +10,16 @@ from z_image_gen.config.paths import (
 __all__ = [
     "Settings",
     "DEFAULT_SETTINGS",
+    "get_default_settings",
     "get_downloads_folder",
     "get_model_cache_path",
     "get_config_path",
     "get_config_file",
 ]
+
+
+def __getattr__(name):
+    """Build DEFAULT_SETTINGS on first access, not on import"""
+    if name == "DEFAULT_SETTINGS":
+        return get_default_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
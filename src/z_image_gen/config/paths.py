@@ -4,7 +4,9 @@ Cross-platform path resolution for z-image-gen
 
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
 from platformdirs import user_cache_dir, user_config_dir, user_downloads_dir
 
@@ -12,14 +14,94 @@ from platformdirs import user_cache_dir, user_config_dir, user_downloads_dir
 APP_NAME = "z-image-gen"
 APP_AUTHOR = "FedoRScorpioN"
 
+# Directories this process has already created or found
+_created_dirs: set = set()
 
+# GUID for Downloads folder
+FOLDERID_DOWNLOADS = "{374DE290-123F-4565-9164-2C9AA0BAD945}"
+
+
+@lru_cache(maxsize=1)
+def _bind_shell32():
+    """
+    Bind SHGetKnownFolderPath and CoTaskMemFree (Windows only, once per process).
+    
+    Returns:
+        Tuple of (SHGetKnownFolderPath, CoTaskMemFree, GUID structure type)
+    """
+    import ctypes
+    from ctypes import wintypes
+    
+    class GUID(ctypes.Structure):
+        _fields_ = [
+            ("Data1", ctypes.c_uint32),
+            ("Data2", ctypes.c_uint16),
+            ("Data3", ctypes.c_uint16),
+            ("Data4", ctypes.c_uint8 * 8),
+        ]
+    
+    ctypes.windll.ole32.CoInitialize(None)
+    
+    SHGetKnownFolderPath = ctypes.windll.shell32.SHGetKnownFolderPath
+    SHGetKnownFolderPath.argtypes = [
+        ctypes.POINTER(GUID),  # rfid (REFKNOWNFOLDERID)
+        wintypes.DWORD,        # dwFlags
+        wintypes.HANDLE,       # hToken
+        ctypes.POINTER(ctypes.c_wchar_p)  # ppszPath
+    ]
+    SHGetKnownFolderPath.restype = ctypes.HRESULT
+    
+    CoTaskMemFree = ctypes.windll.ole32.CoTaskMemFree
+    CoTaskMemFree.argtypes = [ctypes.c_void_p]
+    CoTaskMemFree.restype = None
+    
+    return SHGetKnownFolderPath, CoTaskMemFree, GUID
+
+
+def _get_known_folder(folder_id: str) -> Optional[Path]:
+    """
+    Look up a Windows known folder.
+    
+    Args:
+        folder_id: KNOWNFOLDERID in registry format, e.g. FOLDERID_DOWNLOADS
+    
+    Returns:
+        Folder path, or None if the shell could not resolve it
+    """
+    import ctypes
+    import uuid
+    
+    SHGetKnownFolderPath, CoTaskMemFree, GUID = _bind_shell32()
+    
+    # A GUID struct has the same layout as the UUID's little-endian bytes
+    rfid = GUID.from_buffer_copy(uuid.UUID(folder_id).bytes_le)
+    pszPath = ctypes.c_wchar_p()
+    hr = SHGetKnownFolderPath(ctypes.byref(rfid), 0, None, ctypes.byref(pszPath))
+    
+    try:
+        if hr == 0 and pszPath.value:
+            return Path(pszPath.value)
+        return None
+    finally:
+        # The shell allocates the string, the caller must free it
+        CoTaskMemFree(pszPath)
+
+
+@lru_cache(maxsize=1)
 def get_downloads_folder() -> Path:
     """
     Get the Windows Downloads folder path.
     
+    Resolved once per process. Z_IMAGE_OUTPUT_DIR overrides the lookup.
+    
     Returns:
         Path to Downloads folder
     """
+    # Explicit override skips the shell lookup entirely
+    override = os.getenv("Z_IMAGE_OUTPUT_DIR")
+    if override:
+        return Path(override)
+    
     # Try platformdirs first
     try:
         downloads = user_downloads_dir()
@@ -31,35 +113,9 @@ def get_downloads_folder() -> Path:
     # Fallback: Try Windows known folders
     if sys.platform == "win32":
         try:
-            import ctypes
-            from ctypes import wintypes
-            
-            # GUID for Downloads folder
-            FOLDERID_Downloads = "{374DE290-123F-4565-9164-2C9AA0BAD945}"
-            
-            # Get known folder path
-            ctypes.windll.ole32.CoInitialize(None)
-            
-            # SHGetKnownFolderPath
-            SHGetKnownFolderPath = ctypes.windll.shell32.SHGetKnownFolderPath
-            SHGetKnownFolderPath.argtypes = [
-                ctypes.c_char_p,  # rfid
-                wintypes.DWORD,   # dwFlags
-                wintypes.HANDLE,  # hToken
-                ctypes.POINTER(ctypes.c_wchar_p)  # ppszPath
-            ]
-            SHGetKnownFolderPath.restype = ctypes.HRESULT
-            
-            pszPath = ctypes.c_wchar_p()
-            hr = SHGetKnownFolderPath(
-                FOLDERID_Downloads.encode('utf-8'),
-                0,
-                None,
-                ctypes.byref(pszPath)
-            )
-            
-            if hr == 0 and pszPath.value:
-                return Path(pszPath.value)
+            downloads = _get_known_folder(FOLDERID_DOWNLOADS)
+            if downloads is not None:
+                return downloads
         except Exception:
             pass
     
@@ -73,9 +129,10 @@ def get_downloads_folder() -> Path:
     return home
 
 
+@lru_cache(maxsize=1)
 def get_model_cache_path() -> Path:
     """
-    Get the path for caching model files.
+    Get the path for caching model files (created on first call).
     
     Returns:
         Path to model cache directory
@@ -86,9 +143,10 @@ def get_model_cache_path() -> Path:
     return models_dir
 
 
+@lru_cache(maxsize=1)
 def get_config_path() -> Path:
     """
-    Get the path for configuration files.
+    Get the path for configuration files (created on first call).
     
     Returns:
         Path to config directory
@@ -98,6 +156,7 @@ def get_config_path() -> Path:
     return config_dir
 
 
+@lru_cache(maxsize=1)
 def get_config_file() -> Path:
     """
     Get the path to the config file.
@@ -108,10 +167,24 @@ def get_config_file() -> Path:
     return get_config_path() / "config.yaml"
 
 
+def ensure_directory(path: Path) -> Path:
+    """
+    Create a directory unless this process already did.
+    
+    Args:
+        path: Directory to create
+    
+    Returns:
+        The same path
+    """
+    if path not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(path)
+    return path
+
+
 def ensure_directories() -> None:
     """Ensure all required directories exist"""
     get_model_cache_path()
     get_config_path()
-    downloads = get_downloads_folder()
-    if not downloads.exists():
-        downloads.mkdir(parents=True, exist_ok=True)
+    ensure_directory(get_downloads_folder())
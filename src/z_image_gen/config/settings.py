@@ -3,19 +3,57 @@ Configuration management for z-image-gen
 """
 
 import os
+import string
+import time
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-from z_image_gen.config.paths import get_downloads_folder, get_config_path
+from z_image_gen.config.paths import get_downloads_folder, get_config_path, ensure_directory
 
 
-@dataclass
+@lru_cache(maxsize=8)
+def compile_template(template: str) -> Callable[..., str]:
+    """
+    Parse a filename template once into a function that fills it in.
+    
+    Templates using only plain {seed} and {timestamp} fields are joined
+    from pre-split parts; anything fancier falls back to str.format.
+    
+    Args:
+        template: Template such as "zimage_{seed}_{timestamp}"
+    
+    Returns:
+        Function taking the fields as keyword arguments
+    """
+    parts = []
+    for literal, name, format_spec, conversion in string.Formatter().parse(template):
+        if literal:
+            parts.append((literal, None))
+        if name is None:
+            continue
+        if format_spec or conversion or name not in ("seed", "timestamp"):
+            return template.format
+        parts.append((None, name))
+    
+    def render(**fields) -> str:
+        return "".join(literal if name is None else str(fields[name]) for literal, name in parts)
+    
+    return render
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """Application settings with defaults optimized for 4GB VRAM"""
+    """
+    Application settings with defaults optimized for 4GB VRAM.
+    
+    Instances are immutable; use dataclasses.replace() to derive a
+    modified copy.
+    """
     
     # Model settings
-    model_type: str = "q4_0"
+    model_type: str = "q4_k"
     auto_download: bool = True
     
     # Generation settings (optimized for Z-Image-Turbo)
@@ -29,13 +67,19 @@ class Settings:
     # Output settings
     output_dir: Optional[Path] = None
     filename_template: str = "zimage_{seed}_{timestamp}"
+    image_format: str = "png"  # png, webp or jpg
+    png_compress_level: int = 1  # zlib level, 1 = fastest, 9 = smallest
     save_metadata: bool = True
+    skip_existing: bool = False  # Keep an existing output made from the same request
+    result_cache_mb: int = 512  # Fixed-seed results kept on disk (0 = off)
     
     # Performance settings (optimized for 4GB VRAM)
     use_cuda: bool = True
     low_vram_mode: bool = True
     vae_on_cpu: bool = True
     clip_on_cpu: bool = False
+    threads: int = -1  # -1 = auto-detect physical cores
+    warmup: bool = True  # Tiny generation right after loading the model
     
     # Display settings
     verbose: bool = False
@@ -44,40 +88,48 @@ class Settings:
     def __post_init__(self):
         """Resolve paths after initialization"""
         if self.output_dir is None:
-            self.output_dir = get_downloads_folder()
-        
-        # Ensure output directory exists
-        if isinstance(self.output_dir, Path):
-            self.output_dir.mkdir(parents=True, exist_ok=True)
+            object.__setattr__(self, "output_dir", get_downloads_folder())
     
     @classmethod
+    @lru_cache(maxsize=1)
     def from_env(cls) -> 'Settings':
-        """Create settings from environment variables"""
+        """Create settings from environment variables (read once per process)"""
+        output_dir = os.environ.get("Z_IMAGE_OUTPUT_DIR")
         return cls(
-            model_type=os.getenv("Z_IMAGE_MODEL_TYPE", "q4_0"),
+            model_type=os.getenv("Z_IMAGE_MODEL_TYPE", "q4_k"),
             width=int(os.getenv("Z_IMAGE_WIDTH", "768")),
             height=int(os.getenv("Z_IMAGE_HEIGHT", "512")),
             steps=int(os.getenv("Z_IMAGE_STEPS", "4")),
-            output_dir=Path(path) if (path := os.getenv("Z_IMAGE_OUTPUT_DIR")) else None,
+            output_dir=Path(output_dir) if output_dir else None,
             low_vram_mode=os.getenv("Z_IMAGE_LOW_VRAM", "true").lower() == "true",
             use_cuda=os.getenv("Z_IMAGE_CUDA", "true").lower() == "true",
+            threads=int(os.getenv("Z_IMAGE_THREADS", "-1")),
+            result_cache_mb=int(os.getenv("Z_IMAGE_RESULT_CACHE_MB", "512")),
             verbose=os.getenv("Z_IMAGE_VERBOSE", "false").lower() == "true",
         )
     
     def get_output_path(self, seed: int = -1, timestamp: str = None) -> Path:
         """Generate output file path"""
-        import datetime
-        
         if timestamp is None:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
         
-        filename = self.filename_template.format(
+        filename = compile_template(self.filename_template)(
             seed=seed if seed >= 0 else "random",
             timestamp=timestamp,
         )
         
-        return self.output_dir / f"{filename}.png"
+        # Created on first use rather than whenever Settings are built
+        return ensure_directory(Path(self.output_dir)).joinpath(filename + "." + self.image_format)
+
+
+@lru_cache(maxsize=1)
+def get_default_settings() -> Settings:
+    """Get the shared default settings, built on first use"""
+    return Settings()
 
 
-# Default settings instance
-DEFAULT_SETTINGS = Settings()
+def __getattr__(name):
+    """Build DEFAULT_SETTINGS on first access, not on import"""
+    if name == "DEFAULT_SETTINGS":
+        return get_default_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
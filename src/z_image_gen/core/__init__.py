@@ -1,5 +1,12 @@
 """Core module initialization"""
-from z_image_gen.core.generator import ZImageGenerator, GenerationError
-from z_image_gen.core.model import ModelManager, ModelInfo, MODELS
+from z_image_gen.core.model import ModelManager, ModelInfo, MODELS, DEFAULT_MODEL, get_model_manager, verify_many
 
-__all__ = ["ZImageGenerator", "GenerationError", "ModelManager", "ModelInfo", "MODELS"]
+__all__ = ["ZImageGenerator", "GenerationError", "ModelManager", "ModelInfo", "MODELS", "DEFAULT_MODEL", "get_model_manager", "verify_many"]
+
+
+def __getattr__(name):
+    """Import the generator (and stable-diffusion.cpp) only when it is used"""
+    if name in ("ZImageGenerator", "GenerationError"):
+        from z_image_gen.core import generator
+        return getattr(generator, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,132 @@
+"""
+On-disk cache of generated images for fixed-seed requests
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+from z_image_gen.config.paths import get_model_cache_path
+
+
+class ResultCache:
+    """
+    Content-addressed store of finished images.
+    
+    With a fixed seed the backend is deterministic, so an identical
+    request can be answered from disk without loading the model.
+    Least recently used images are evicted once the cache grows past
+    its byte budget.
+    """
+    
+    def __init__(self, max_bytes: int, cache_dir: Optional[Path] = None):
+        """
+        Initialize the result cache.
+        
+        Args:
+            max_bytes: Size budget for cached images (0 disables the cache)
+            cache_dir: Directory for cached images (default: next to the models)
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir or get_model_cache_path().parent / "results"
+    
+    @property
+    def enabled(self) -> bool:
+        """Check if the cache stores anything"""
+        return self.max_bytes > 0
+    
+    @staticmethod
+    def key(*fields) -> str:
+        """
+        Build a cache key from everything that affects the output.
+        
+        Args:
+            *fields: Request parameters, in a fixed order
+        
+        Returns:
+            Hex digest identifying the request
+        """
+        text = "|".join(str(value) for value in fields)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        """Get the file holding the image for a key"""
+        return self.cache_dir / f"{key}.png"
+    
+    def get(self, key: str) -> Optional[Image.Image]:
+        """
+        Load a cached image.
+        
+        Args:
+            key: Key from ResultCache.key()
+        
+        Returns:
+            The image, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        path = self._path(key)
+        try:
+            with Image.open(path) as image:
+                image.load()
+                result = image.copy()
+            # Mark as recently used for eviction
+            os.utime(path)
+        except (OSError, SyntaxError):
+            return None
+        return result
+    
+    def put(self, key: str, image: Image.Image) -> None:
+        """
+        Store an image, then evict old entries over the budget.
+        
+        Args:
+            key: Key from ResultCache.key()
+            image: Image to store
+        """
+        if not self.enabled:
+            return
+        
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            image.save(temp_path, format="PNG", compress_level=1)
+            os.replace(temp_path, path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            return
+        
+        self._evict()
+    
+    def _evict(self) -> None:
+        """Delete the least recently used images until the cache fits its budget"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process since the directory was listed
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
@@ -3,17 +3,28 @@ Image generation engine using stable-diffusion-cpp-python
 """
 
 import gc
+import inspect
+import math
+import os
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List, Union
 
 from PIL import Image
-from rich.console import Console
 
-from z_image_gen.core.model import ModelManager, ModelNotFoundError
+from z_image_gen.core.cache import ResultCache
+from z_image_gen.core.model import get_model_manager, ModelNotFoundError, DEFAULT_MODEL, prefetch_model
 from z_image_gen.config.settings import Settings
+from z_image_gen.utils.console import get_console
+from z_image_gen.utils.gpu import get_free_vram
 
-console = Console()
+console = get_console()
+
+# Keep OpenMP workers on physical cores for the CPU-offloaded VAE and params.
+# Must be set before the backend is imported.
+os.environ.setdefault("OMP_PROC_BIND", "close")
+os.environ.setdefault("OMP_PLACES", "cores")
 
 # Try to import stable_diffusion_cpp
 try:
@@ -24,6 +35,90 @@ except ImportError:
     console.print("[yellow]Warning: stable-diffusion-cpp-python not installed.[/yellow]")
     console.print("[dim]Install with: pip install stable-diffusion-cpp-python[/dim]")
 
+# Pixel budget that fits in ~3 GB of free VRAM (4GB card with a desktop running)
+BASE_MAX_PIXELS = 768 * 512
+BASE_FREE_VRAM = 3 * 1024**3
+
+# Reduced render sizes are snapped down to this so no latent tile is padded
+SIZE_MULTIPLE = 64
+
+# Flash attention flags understood by StableDiffusion(...)
+FLASH_ATTN_PARAMS = ("flash_attn", "diffusion_flash_attn")
+
+
+@lru_cache(maxsize=1)
+def detect_flash_attn() -> dict:
+    """
+    Detect which flash attention flags the installed backend supports.
+    
+    Set Z_IMAGE_FLASH_ATTN=false to force flash attention off.
+    
+    Returns:
+        Keyword arguments enabling flash attention for StableDiffusion(...)
+    """
+    if not SD_CPP_AVAILABLE:
+        return {}
+    
+    if os.getenv("Z_IMAGE_FLASH_ATTN", "true").lower() != "true":
+        return {}
+    
+    try:
+        params = inspect.signature(StableDiffusion.__init__).parameters
+    except (TypeError, ValueError):
+        return {}
+    
+    return {name: True for name in FLASH_ATTN_PARAMS if name in params}
+
+
+def max_pixels_for_vram(free_vram: Optional[int]) -> int:
+    """
+    Get the largest image area that can be rendered in the given VRAM.
+    
+    Args:
+        free_vram: Free VRAM in bytes (None if unknown)
+    
+    Returns:
+        Maximum number of pixels per image
+    """
+    if free_vram is None:
+        return BASE_MAX_PIXELS
+    return max(BASE_MAX_PIXELS // 4, int(BASE_MAX_PIXELS * free_vram / BASE_FREE_VRAM))
+
+
+def render_size(width: int, height: int, max_pixels: Optional[int]) -> tuple[int, int]:
+    """
+    Get the size to render at so the image fits the pixel budget.
+    
+    Sizes within 10% of the budget are kept. Larger ones are scaled down
+    keeping the aspect ratio, with both sides snapped down to multiples
+    of SIZE_MULTIPLE and the area never above max_pixels.
+    
+    Args:
+        width: Requested width
+        height: Requested height
+        max_pixels: Pixel budget (None for no limit)
+    
+    Returns:
+        Tuple of (width, height) to render at
+    """
+    if max_pixels is None or width * height <= max_pixels * 1.1:  # 10% tolerance
+        return width, height
+    
+    # Masking with -SIZE_MULTIPLE rounds down to a multiple
+    ratio = width / height
+    height = max(SIZE_MULTIPLE, int(math.sqrt(max_pixels / ratio)) & -SIZE_MULTIPLE)
+    width = max(SIZE_MULTIPLE, int(height * ratio) & -SIZE_MULTIPLE)
+    
+    # The SIZE_MULTIPLE floor on the short side can overshoot for extreme
+    # ratios: give the long side only what is left of the budget
+    if width * height > max_pixels:
+        if width >= height:
+            width = max(SIZE_MULTIPLE, (max_pixels // height) & -SIZE_MULTIPLE)
+        else:
+            height = max(SIZE_MULTIPLE, (max_pixels // width) & -SIZE_MULTIPLE)
+    
+    return width, height
+
 
 class ZImageGenerator:
     """
@@ -33,7 +128,7 @@ class ZImageGenerator:
     
     def __init__(
         self,
-        model_type: str = "q4_0",
+        model_type: str = DEFAULT_MODEL,
         model_path: Optional[Path] = None,
         settings: Optional[Settings] = None,
     ):
@@ -41,7 +136,7 @@ class ZImageGenerator:
         Initialize the image generator.
         
         Args:
-            model_type: Model quantization type (q4_0, q5_0, q8_0)
+            model_type: Model quantization type (q4_k, q5_k, q4_0, q5_0, q8_0)
             model_path: Direct path to model file (overrides model_type)
             settings: Custom settings (uses defaults if None)
         """
@@ -62,26 +157,19 @@ class ZImageGenerator:
             if not self.model_path.exists():
                 raise ModelNotFoundError(f"Model not found: {model_path}")
         else:
-            manager = ModelManager(model_type)
-            self.model_path = manager.get_model_path()
-    
-    def _load_model(self) -> None:
-        """Load the model with VRAM optimizations"""
-        if self._model_loaded:
-            return
+            self.model_path = get_model_manager(model_type).get_model_path()
         
-        console.print(f"[bold blue]Loading model from {self.model_path}...[/bold blue]")
+        # Fixed-seed results are reproducible, keep them on disk
+        self.results = ResultCache(self.settings.result_cache_mb * 1024 * 1024)
         
-        start_time = time.time()
+        # Measure free VRAM before the model takes its share
+        self.max_pixels = max_pixels_for_vram(get_free_vram()) if self.settings.low_vram_mode else None
         
-        # Configure for low VRAM
-        self._sd = StableDiffusion(
-            model_path=str(self.model_path),
-            
+        # Backend options are fixed for the generator's lifetime, build them once
+        self._sd_options = dict(
             # VRAM optimizations for 4GB
             offload_params_to_cpu=self.settings.low_vram_mode,
-            flash_attn=True,
-            diffusion_flash_attn=True,
+            **detect_flash_attn(),
             
             # Offload components to save VRAM
             keep_clip_on_cpu=self.settings.clip_on_cpu,
@@ -89,15 +177,62 @@ class ZImageGenerator:
             vae_decode_only=True,
             
             # Threading
-            n_threads=-1,  # Auto-detect
+            n_threads=self.settings.threads,  # -1 = auto-detect
             
             verbose=self.settings.verbose,
         )
+        self._generate_options = dict(
+            batch_count=1,
+            
+            # VRAM optimization
+            vae_tiling=self.settings.low_vram_mode,
+        )
+    
+    def _load_model(self) -> None:
+        """Load the model with VRAM optimizations"""
+        if self._model_loaded:
+            return
+        
+        console.print(f"[bold blue]Loading model from {self.model_path}...[/bold blue]")
+        
+        # Warm the page cache while the backend initializes
+        prefetch_model(self.model_path)
+        
+        start_time = time.perf_counter()
+        
+        # Configure for low VRAM
+        self._sd = StableDiffusion(
+            model_path=str(self.model_path),
+            **self._sd_options,
+        )
         
-        load_time = time.time() - start_time
+        load_time = time.perf_counter() - start_time
         console.print(f"[green]✓ Model loaded in {load_time:.1f}s[/green]")
         
         self._model_loaded = True
+        
+        if self.settings.warmup:
+            self._warmup()
+    
+    def _warmup(self) -> None:
+        """Run a tiny 1-step generation so kernel setup is not timed on the first prompt"""
+        start_time = time.perf_counter()
+        
+        try:
+            self._sd.generate_image(
+                prompt=" ",
+                width=64,
+                height=64,
+                sample_steps=1,
+                seed=0,
+                cfg_scale=0.0,
+                sample_method=self.settings.sample_method,
+                **self._generate_options,
+            )
+        except Exception:
+            return
+        
+        console.print(f"[dim]Warm-up done in {time.perf_counter() - start_time:.1f}s[/dim]")
     
     def generate(
         self,
@@ -128,29 +263,44 @@ class ZImageGenerator:
         Returns:
             PIL Image object
         """
-        # Load model if needed
-        self._load_model()
-        
         # Use settings defaults
         width = width or self.settings.width
         height = height or self.settings.height
         steps = steps or self.settings.steps
         
-        # Validate dimensions for 4GB VRAM
-        if self.settings.low_vram_mode:
-            max_pixels = 768 * 512  # ~393k pixels
-            current_pixels = width * height
-            if current_pixels > max_pixels * 1.1:  # 10% tolerance
-                scale = (max_pixels / current_pixels) ** 0.5
-                width = int(width * scale)
-                height = int(height * scale)
-                console.print(f"[yellow]Resolution adjusted to {width}x{height} for VRAM constraints[/yellow]")
+        # Render above the VRAM budget at a smaller size, then upscale
+        target_size = (width, height)
+        width, height = render_size(width, height, self.max_pixels)
+        
+        # A repeated fixed-seed request is answered without loading the model.
+        # The render size is part of the key so an upscaled image is never
+        # served where a native render is possible.
+        cache_key = None
+        if seed >= 0:
+            cache_key = ResultCache.key(
+                self.model_path.name, prompt, negative_prompt, *target_size,
+                steps, seed, cfg_scale, sample_method, scheduler, width, height,
+            )
+            cached = self.results.get(cache_key)
+            if cached is not None:
+                console.print(f"[green]✓ Reused cached result for seed {seed}[/green]")
+                return cached
+        
+        # Load model if needed
+        self._load_model()
+        
+        if (width, height) != target_size:
+            console.print(f"[yellow]Rendering at {width}x{height} for VRAM constraints, upscaling to {target_size[0]}x{target_size[1]}[/yellow]")
+        
+        # Without flash attention, attention memory grows quadratically
+        if not detect_flash_attn() and width * height > 768 * 768:
+            console.print("[yellow]Flash attention unavailable - large images may run out of VRAM[/yellow]")
         
         console.print(f"\n[bold]Generating image...[/bold]")
         console.print(f"[dim]Prompt: {prompt}[/dim]")
         console.print(f"[dim]Size: {width}x{height} | Steps: {steps} | Seed: {seed}[/dim]")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             images = self._sd.generate_image(
@@ -163,20 +313,22 @@ class ZImageGenerator:
                 cfg_scale=cfg_scale,
                 sample_method=sample_method,
                 scheduler=scheduler,
-                batch_count=1,
-                
-                # VRAM optimization
-                vae_tiling=self.settings.low_vram_mode,
+                **self._generate_options,
             )
             
-            generation_time = time.time() - start_time
+            generation_time = time.perf_counter() - start_time
             console.print(f"[green]✓ Generated in {generation_time:.1f}s[/green]")
             
-            # Clean up if needed
-            if self.settings.low_vram_mode:
-                gc.collect()
+            if not images:
+                return None
+            
+            image = images[0]
+            if image.size != target_size:
+                image = image.resize(target_size, Image.LANCZOS)
             
-            return images[0] if images else None
+            if cache_key is not None:
+                self.results.put(cache_key, image)
+            return image
             
         except Exception as e:
             console.print(f"[red]Generation failed: {e}[/red]")
@@ -3,19 +3,37 @@ Model management - download and verify Z-Image GGUF models
 """
 
 import os
+import atexit
+import json
 import hashlib
-import shutil
+import mmap
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Callable
+from typing import ClassVar, Optional, Callable, Iterable, Iterator, TYPE_CHECKING
 from dataclasses import dataclass
 
-import requests
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
-
 from z_image_gen.config.paths import get_model_cache_path
+from z_image_gen.utils.console import get_console
+
+# requests and rich are imported where they are used, so loading the
+# registry (e.g. for CLI choices) stays cheap
+if TYPE_CHECKING:
+    import requests
 
-console = Console()
+# Parallel download tuning
+DOWNLOAD_CONNECTIONS = 8  # Override with Z_IMAGE_DL_CONNECTIONS
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+PROGRESS_INTERVAL = 0.05  # Seconds between progress updates (20 Hz)
+DOWNLOAD_RETRIES = 5  # Per segment, with exponential backoff
+HTTP_POOL_SIZE = 16  # Kept-alive connections shared by all downloads
+HASH_BLOCK_SIZE = 16 * 1024 * 1024  # 16 MiB
+
+# Hugging Face reports the SHA-256 of LFS files in X-Linked-Etag
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
 
 
 @dataclass
@@ -28,8 +46,23 @@ class ModelInfo:
     sha256: Optional[str] = None
 
 
+# Default quantization: K-quants keep more quality than Q*_0 at the same size
+DEFAULT_MODEL = "q4_k"
+
 # Z-Image-Turbo model configuration
 MODELS = {
+    "q4_k": ModelInfo(
+        name="Z-Image-Turbo Q4_K",
+        filename="z_image_turbo-Q4_K.gguf",
+        url="https://huggingface.co/leejet/Z-Image-Turbo-GGUF/resolve/main/z_image_turbo-Q4_K.gguf",
+        size_bytes=4_300_000_000,  # ~4.0 GB
+    ),
+    "q5_k": ModelInfo(
+        name="Z-Image-Turbo Q5_K",
+        filename="z_image_turbo-Q5_K.gguf",
+        url="https://huggingface.co/leejet/Z-Image-Turbo-GGUF/resolve/main/z_image_turbo-Q5_K.gguf",
+        size_bytes=5_000_000_000,  # ~4.66 GB
+    ),
     "q4_0": ModelInfo(
         name="Z-Image-Turbo Q4_0",
         filename="z_image_turbo-Q4_0.gguf",
@@ -50,16 +83,100 @@ MODELS = {
     ),
 }
 
+# Recommended VRAM per model type
+RECOMMENDED_VRAM = {
+    "q4_k": "4GB",
+    "q4_0": "4GB",
+    "q5_k": "6GB",
+    "q5_0": "6GB",
+    "q8_0": "8GB+",
+}
+
+
+def _download_connections() -> int:
+    """Get the number of parallel connections for ranged downloads"""
+    try:
+        return max(1, int(os.environ.get("Z_IMAGE_DL_CONNECTIONS", DOWNLOAD_CONNECTIONS)))
+    except ValueError:
+        return DOWNLOAD_CONNECTIONS
+
+
+def _iter_raw(response: "requests.Response") -> Iterator[bytes]:
+    """Read a streamed response body in large chunks, bypassing iter_content"""
+    import requests
+    import urllib3
+    
+    # Only decode when the server actually compressed the body
+    response.raw.decode_content = 'content-encoding' in response.headers
+    read = response.raw.read
+    while True:
+        try:
+            chunk = read(DOWNLOAD_CHUNK_SIZE)
+        except urllib3.exceptions.HTTPError as e:
+            # raw reads skip requests' exception wrapping
+            raise requests.ConnectionError(e) from e
+        if not chunk:
+            return
+        yield chunk
+
+
+def _preallocate(f, size: int) -> None:
+    """Size an open file and reserve its blocks up front so it is laid out contiguously"""
+    f.truncate(size)
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except OSError:
+            # Network and some FUSE filesystems do not support it
+            pass
+
+
+def _sha256_file(path: Path) -> str:
+    """Hash a file through a memory map instead of copying it in small reads"""
+    sha256_hash = hashlib.sha256()
+    
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return sha256_hash.hexdigest()
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                # Aggressive readahead; pages are kept for the loader
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), HASH_BLOCK_SIZE):
+                    sha256_hash.update(view[offset:offset + HASH_BLOCK_SIZE])
+            finally:
+                view.release()
+    
+    return sha256_hash.hexdigest()
+
 
 class ModelManager:
     """Manage model download and caching"""
     
-    def __init__(self, model_type: str = "q4_0", cache_dir: Optional[Path] = None):
+    __slots__ = (
+        "model_type",
+        "model_info",
+        "cache_dir",
+        "model_path",
+        "temp_path",
+        "state_path",
+        "checksum_path",
+        "verified_path",
+        "_present",
+    )
+    
+    _session: ClassVar[Optional["requests.Session"]] = None
+    _session_lock: ClassVar[threading.Lock] = threading.Lock()
+    
+    def __init__(self, model_type: str = DEFAULT_MODEL, cache_dir: Optional[Path] = None):
         """
         Initialize model manager.
         
         Args:
-            model_type: Model type (q4_0, q5_0, q8_0)
+            model_type: Model type (q4_k, q5_k, q4_0, q5_0, q8_0)
             cache_dir: Custom cache directory (default: system cache)
         """
         if model_type not in MODELS:
@@ -69,10 +186,48 @@ class ModelManager:
         self.model_info = MODELS[model_type]
         self.cache_dir = cache_dir or get_model_cache_path()
         self.model_path = self.cache_dir / self.model_info.filename
+        self.temp_path = self.model_path.with_suffix(".downloading")
+        self.state_path = self.model_path.with_suffix(".part.json")
+        self.checksum_path = self.model_path.with_suffix(".sha256")
+        self.verified_path = self.model_path.with_suffix(".verified")
+        self._present = False  # Set once get_model_path() has found the file
+    
+    @classmethod
+    def _get_session(cls) -> "requests.Session":
+        """
+        Get the HTTP session shared by all managers.
+        
+        Keeps connections (and their TLS sessions) alive across the probe,
+        the parallel ranges, retries and resumed downloads.
+        
+        Returns:
+            requests.Session, created on first use
+        """
+        with cls._session_lock:
+            if cls._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                
+                pool_size = max(HTTP_POOL_SIZE, _download_connections())
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                atexit.register(session.close)
+                cls._session = session
+            return cls._session
     
     def is_downloaded(self) -> bool:
         """Check if model is already downloaded"""
-        return self.model_path.exists() and self.model_path.stat().st_size > 0
+        try:
+            return self.model_path.stat().st_size > 0
+        except OSError:
+            return False
     
     def get_model_path(self) -> Path:
         """
@@ -81,35 +236,41 @@ class ModelManager:
         Returns:
             Path to the model file
         """
-        if not self.is_downloaded():
-            self.download()
+        if not self._present:
+            if self.is_downloaded() and not self.verify():
+                get_console().print("[yellow]Model failed the integrity check, downloading again...[/yellow]")
+                self.delete()
+            if not self.is_downloaded():
+                self.download()
+                if not self.verify():
+                    raise DownloadError("Downloaded model does not match its checksum")
+            self._present = True
         return self.model_path
     
     def download(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> None:
         """
         Download the model with progress display.
         
+        Uses parallel HTTP Range requests when the server supports them and
+        resumes an interrupted download from the completed byte ranges.
+        
         Args:
             progress_callback: Optional callback for progress updates (downloaded, total)
         """
+        import requests
+        from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
+        
         # Ensure cache directory exists
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # Temporary download path
-        temp_path = self.model_path.with_suffix(".downloading")
-        
+        console = get_console()
         console.print(f"\n[bold blue]Downloading {self.model_info.name}...[/bold blue]")
         console.print(f"[dim]URL: {self.model_info.url}[/dim]")
         console.print(f"[dim]Size: {self.model_info.size_bytes / (1024**3):.2f} GB[/dim]")
         console.print()
         
         try:
-            # Stream download with progress
-            response = requests.get(self.model_info.url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', self.model_info.size_bytes))
-            downloaded = 0
+            total_size, accepts_ranges, sha256 = self._probe()
             
             with Progress(
                 SpinnerColumn(),
@@ -121,79 +282,382 @@ class ModelManager:
                 console=console,
             ) as progress:
                 task = progress.add_task("Downloading", total=total_size)
+                reported_at = 0.0
                 
-                with open(temp_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            progress.update(task, completed=downloaded)
-                            
-                            if progress_callback:
-                                progress_callback(downloaded, total_size)
+                def report(downloaded: int) -> None:
+                    nonlocal reported_at
+                    now = time.monotonic()
+                    if now - reported_at < PROGRESS_INTERVAL and downloaded < total_size:
+                        return
+                    reported_at = now
+                    progress.update(task, completed=downloaded)
+                    if progress_callback:
+                        progress_callback(downloaded, total_size)
+                
+                if accepts_ranges:
+                    self._download_ranged(total_size, report)
+                else:
+                    self._download_stream(total_size, report)
+            
+            # Move to final location: one atomic rename, since temp_path
+            # lives next to model_path and never crosses filesystems
+            os.replace(self.temp_path, self.model_path)
+            if self.state_path.exists():
+                self.state_path.unlink()
             
-            # Move to final location
-            shutil.move(str(temp_path), str(self.model_path))
+            # Remember the published checksum for verify()
+            if sha256:
+                self.checksum_path.write_text(sha256)
             
             console.print(f"\n[bold green]✓ Model downloaded successfully![/bold green]")
             console.print(f"[dim]Saved to: {self.model_path}[/dim]")
             
         except requests.RequestException as e:
-            # Clean up partial download
-            if temp_path.exists():
-                temp_path.unlink()
             raise DownloadError(f"Failed to download model: {e}")
         
         except KeyboardInterrupt:
-            # Clean up on user interrupt
-            if temp_path.exists():
-                temp_path.unlink()
-            console.print("\n[yellow]Download cancelled.[/yellow]")
+            if self.state_path.exists():
+                console.print("\n[yellow]Download paused. Run again to resume.[/yellow]")
+            else:
+                console.print("\n[yellow]Download cancelled.[/yellow]")
+            raise
+    
+    def _probe(self) -> tuple[int, bool, Optional[str]]:
+        """
+        Query the download size, Range support and published checksum.
+        
+        Returns:
+            Tuple of (total size in bytes, whether byte ranges are accepted,
+            SHA-256 reported by the server or None)
+        """
+        response = self._get_session().head(self.model_info.url, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+        
+        sha256 = None
+        for hop in (*response.history, response):
+            etag = hop.headers.get('x-linked-etag', '').strip('"').lower()
+            if SHA256_PATTERN.match(etag):
+                sha256 = etag
+                break
+        
+        total_size = int(response.headers.get('content-length', 0))
+        if total_size <= 0:
+            return self.model_info.size_bytes, False, sha256
+        
+        accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+        return total_size, accepts_ranges, sha256
+    
+    def _download_stream(self, total_size: int, report: Callable[[int], None]) -> None:
+        """Download over a single connection (server without Range support)"""
+        downloaded = 0
+        
+        try:
+            response = self._get_session().get(self.model_info.url, stream=True, timeout=30)
+            response.raise_for_status()
+            
+            length = int(response.headers.get('content-length', 0))
+            
+            with open(self.temp_path, 'wb') as f:
+                if length > 0 and 'content-encoding' not in response.headers:
+                    _preallocate(f, length)
+                for chunk in _iter_raw(response):
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    report(downloaded)
+                # Drop any reserved tail if the body came up short
+                f.truncate(downloaded)
+            
+            if length > 0 and 'content-encoding' not in response.headers and downloaded < length:
+                raise DownloadError(f"Incomplete download: got {downloaded} of {length} bytes")
+        
+        except BaseException:
+            # Cannot resume without Range support - clean up partial download
+            if self.temp_path.exists():
+                self.temp_path.unlink()
             raise
     
-    def verify(self) -> bool:
+    def _download_ranged(self, total_size: int, report: Callable[[int], None]) -> None:
+        """Download byte ranges in parallel into a preallocated file"""
+        import requests
+        
+        segments = self._load_state(total_size)
+        
+        if segments is None:
+            with open(self.temp_path, 'wb') as f:
+                _preallocate(f, total_size)
+            step = -(-total_size // _download_connections())
+            segments = [
+                [start, min(start + step, total_size)]
+                for start in range(0, total_size, step)
+            ]
+        
+        session = self._get_session()
+        lock = threading.Lock()
+        stop = threading.Event()
+        downloaded = total_size - sum(end - pos for pos, end in segments)
+        report(downloaded)
+        
+        def fetch(segment: list) -> None:
+            for attempt in range(DOWNLOAD_RETRIES):
+                try:
+                    return fetch_range(segment)
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError):
+                    # Dropped connection: pick up from the last byte written
+                    if stop.is_set() or attempt == DOWNLOAD_RETRIES - 1:
+                        raise
+                    stop.wait(2 ** attempt)
+        
+        def fetch_range(segment: list) -> None:
+            nonlocal downloaded
+            pos, end = segment
+            if pos >= end:
+                return
+            
+            headers = {"Range": f"bytes={pos}-{end - 1}"}
+            # Concurrent requests each get their own pooled connection
+            with session.get(self.model_info.url, headers=headers, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise DownloadError("Server ignored the Range request")
+                
+                with open(self.temp_path, 'r+b') as f:
+                    f.seek(pos)
+                    for chunk in _iter_raw(response):
+                        if stop.is_set():
+                            return
+                        f.write(chunk)
+                        with lock:
+                            segment[0] += len(chunk)
+                            downloaded += len(chunk)
+                            report(downloaded)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                futures = [executor.submit(fetch, segment) for segment in segments]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    stop.set()
+                    raise
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 416:
+                # The remote file changed under the saved ranges: start over
+                self.temp_path.unlink(missing_ok=True)
+                self.state_path.unlink(missing_ok=True)
+            else:
+                self._save_state(total_size, segments)
+            raise
+        except BaseException:
+            # Keep the partial file and remember what is already on disk
+            self._save_state(total_size, segments)
+            raise
+        
+        # A body that ended early without an error leaves a zero-filled hole
+        if any(pos < end for pos, end in segments):
+            self._save_state(total_size, segments)
+            raise DownloadError("Incomplete download, run again to resume")
+    
+    def _load_state(self, total_size: int) -> Optional[list]:
+        """Load remaining byte ranges of an interrupted download"""
+        if not (self.state_path.exists() and self.temp_path.exists()):
+            return None
+        
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return None
+        
+        if state.get("url") != self.model_info.url or state.get("total") != total_size:
+            return None
+        if self.temp_path.stat().st_size != total_size:
+            return None
+        
+        return state["segments"]
+    
+    def _save_state(self, total_size: int, segments: list) -> None:
+        """Persist remaining byte ranges so the download can be resumed"""
+        state = {
+            "url": self.model_info.url,
+            "total": total_size,
+            "segments": segments,
+        }
+        self.state_path.write_text(json.dumps(state))
+    
+    def expected_sha256(self) -> Optional[str]:
+        """Get the known SHA-256 of the model (registry first, then download record)"""
+        if self.model_info.sha256 is not None:
+            return self.model_info.sha256
+        
+        try:
+            return self.checksum_path.read_text().strip() or None
+        except OSError:
+            return None
+    
+    def is_verified(self, expected: str) -> bool:
+        """
+        Check if the model was already hashed and has not changed since.
+        
+        Args:
+            expected: SHA-256 the model must match
+        
+        Returns:
+            True if the .verified record matches the file's size and mtime
+        """
+        try:
+            stat = self.model_path.stat()
+            size, mtime_ns, sha256 = self.verified_path.read_text().split(":")
+        except (OSError, ValueError):
+            return False
+        
+        return (int(size), int(mtime_ns), sha256) == (stat.st_size, stat.st_mtime_ns, expected)
+    
+    def _mark_verified(self, sha256: str) -> None:
+        """Record the size and mtime the model had when its hash matched"""
+        stat = self.model_path.stat()
+        temp_path = self.verified_path.with_name(f"{self.verified_path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(f"{stat.st_size}:{stat.st_mtime_ns}:{sha256}")
+            os.replace(temp_path, self.verified_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+    
+    def verify(self, force: bool = False) -> bool:
         """
         Verify model integrity (if SHA256 is available).
         
+        The full hash is only computed when the file changed since it last
+        matched; otherwise this is a single stat().
+        
+        Args:
+            force: Hash the file even if it is recorded as verified
+        
         Returns:
             True if model is valid
         """
         if not self.model_path.exists():
             return False
         
-        if self.model_info.sha256 is None:
+        expected = self.expected_sha256()
+        if expected is None:
             # No checksum available, just check file size
             return self.model_path.stat().st_size > 0
         
-        console.print("[dim]Verifying model integrity...[/dim]")
+        if not force and self.is_verified(expected):
+            return True
         
-        sha256_hash = hashlib.sha256()
-        with open(self.model_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
-                sha256_hash.update(chunk)
+        get_console().print("[dim]Verifying model integrity...[/dim]")
         
-        return sha256_hash.hexdigest() == self.model_info.sha256
+        if _sha256_file(self.model_path) != expected:
+            return False
+        self._mark_verified(expected)
+        return True
     
     def delete(self) -> None:
         """Delete the model from cache"""
+        self._present = False
+        for path in (self.temp_path, self.state_path, self.checksum_path, self.verified_path):
+            if path.exists():
+                path.unlink()
+        
         if self.model_path.exists():
             self.model_path.unlink()
-            console.print(f"[yellow]Model deleted: {self.model_path}[/yellow]")
+            get_console().print(f"[yellow]Model deleted: {self.model_path}[/yellow]")
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def list_available_models() -> list:
-        """List all available model types"""
+        """List all available model types (built once, do not modify)"""
         return [
             {
                 "type": key,
                 "name": info.name,
                 "size_gb": info.size_bytes / (1024**3),
-                "recommended_vram": "4GB" if key == "q4_0" else "6GB" if key == "q5_0" else "8GB+",
+                "recommended_vram": RECOMMENDED_VRAM[key],
             }
             for key, info in MODELS.items()
         ]
 
 
+@lru_cache(maxsize=None)
+def get_model_manager(model_type: str = DEFAULT_MODEL) -> ModelManager:
+    """
+    Get the shared manager for a model type in the default cache.
+    
+    Args:
+        model_type: Model type (q4_k, q5_k, q4_0, q5_0, q8_0)
+    
+    Returns:
+        ModelManager instance, reused across calls
+    """
+    return ModelManager(model_type)
+
+
+def verify_many(managers: Iterable[ModelManager], force: bool = False) -> list:
+    """
+    Verify several model files at once.
+    
+    hashlib releases the GIL while hashing large buffers, so the files
+    are hashed on parallel threads and the check runs at disk speed
+    rather than one core's SHA-256 speed.
+    
+    Args:
+        managers: Managers of the models to check
+        force: Hash files even if they are recorded as verified
+    
+    Returns:
+        Verification results, in the same order as managers
+    """
+    managers = list(managers)
+    if len(managers) < 2:
+        return [manager.verify(force=force) for manager in managers]
+    
+    workers = min(len(managers), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda manager: manager.verify(force=force), managers))
+
+
+def _prefetch(path: Path) -> None:
+    """Pull the model file into the OS page cache"""
+    try:
+        with open(path, 'rb') as f:
+            if hasattr(os, "posix_fadvise"):
+                # Let the kernel read ahead asynchronously
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                return
+            
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            
+            # Windows: fault in one byte per page of a mapping, so the file
+            # reaches the cache without being copied through Python
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(0, size, mmap.PAGESIZE):
+                    mapped[offset]
+    except (OSError, ValueError):
+        pass
+
+
+def prefetch_model(path: Path) -> threading.Thread:
+    """
+    Start warming the page cache for a model file in the background.
+    
+    Overlaps disk reads with backend initialization so the loader hits
+    cached pages. Only worth starting when the model is about to load.
+    
+    Args:
+        path: Path to the model file
+    
+    Returns:
+        The started daemon thread
+    """
+    thread = threading.Thread(target=_prefetch, args=(path,), daemon=True)
+    thread.start()
+    return thread
+
+
 class DownloadError(Exception):
     """Failed to download model"""
     pass
@@ -1 +1,6 @@
 """Utils module initialization"""
+from z_image_gen.utils.console import get_console
+from z_image_gen.utils.gpu import get_free_vram, get_gpu_info
+from z_image_gen.utils.image import save_image, read_parameters, IMAGE_FORMATS
+
+__all__ = ["get_console", "get_free_vram", "get_gpu_info", "save_image", "read_parameters", "IMAGE_FORMATS"]
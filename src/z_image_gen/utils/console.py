@@ -0,0 +1,20 @@
+"""
+Console shared by all modules for status output
+"""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def get_console():
+    """
+    Get the shared rich console, importing rich on first use.
+    
+    Every module prints through this one instance, so status output can
+    be moved off stdout in one place (see serve mode).
+    
+    Returns:
+        rich Console instance
+    """
+    from rich.console import Console
+    return Console()
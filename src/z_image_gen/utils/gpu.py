@@ -0,0 +1,56 @@
+"""
+GPU queries used to size generation for the available VRAM
+"""
+
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import Optional
+
+
+@lru_cache(maxsize=1)
+def _query_nvidia_smi() -> Optional[tuple]:
+    """
+    Query the first GPU once per process, for every helper below.
+    
+    Returns:
+        Tuple of (name, total MiB, free MiB), or None if no NVIDIA GPU is found
+    """
+    nvidia_smi = shutil.which("nvidia-smi")
+    if nvidia_smi is None:
+        return None
+    
+    try:
+        result = subprocess.run(
+            [nvidia_smi, "--query-gpu=name,memory.total,memory.free", "--format=csv,noheader,nounits"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        )
+        name, total, free = result.stdout.splitlines()[0].rsplit(",", 2)
+        return name.strip(), int(total), int(free)
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+
+def get_free_vram() -> Optional[int]:
+    """
+    Get free VRAM on the first GPU, measured once per process.
+    
+    Returns:
+        Free VRAM in bytes, or None if it cannot be determined
+    """
+    gpu = _query_nvidia_smi()
+    return gpu[2] * 1024**2 if gpu is not None else None
+
+
+def get_gpu_info() -> Optional[dict]:
+    """
+    Get the name and total VRAM of the first GPU, queried once per process.
+    
+    Returns:
+        Dict with "name" and "vram_gb", or None if no NVIDIA GPU is found
+    """
+    gpu = _query_nvidia_smi()
+    return {"name": gpu[0], "vram_gb": gpu[1] / 1024} if gpu is not None else None
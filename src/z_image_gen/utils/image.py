@@ -0,0 +1,89 @@
+"""
+Image saving with fast encoder settings
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+# PIL is only needed once there is an image to save
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# Output formats and their encoder options, tuned for speed over file size
+IMAGE_FORMATS = {
+    "png": {"format": "PNG", "compress_level": 1},
+    "webp": {"format": "WEBP", "lossless": True, "method": 0},
+    "jpg": {"format": "JPEG", "quality": 95},
+}
+
+
+def save_image(
+    image: "Image.Image",
+    path: Path,
+    png_compress_level: Optional[int] = None,
+    parameters: Optional[str] = None,
+) -> None:
+    """
+    Save an image, picking the encoder from the file extension.
+    
+    The image is encoded in memory, written to a temporary file with a
+    single call and renamed into place, so a partially written file is
+    never visible at the output path.
+    
+    Args:
+        image: Image to save
+        path: Output path (.png, .webp or .jpg)
+        png_compress_level: zlib level for PNG (default: 1, fastest)
+        parameters: Generation parameters, stored as a PNG text chunk
+    """
+    suffix = path.suffix.lower().lstrip(".")
+    if suffix == "jpeg":
+        suffix = "jpg"
+    
+    options = IMAGE_FORMATS.get(suffix)
+    if options is None:
+        from PIL import Image
+        options = {"format": Image.registered_extensions().get(path.suffix.lower(), "PNG")}
+    
+    if png_compress_level is not None and options["format"] == "PNG":
+        options = {**options, "compress_level": png_compress_level}
+    
+    if parameters is not None and options["format"] == "PNG":
+        from PIL.PngImagePlugin import PngInfo
+        
+        info = PngInfo()
+        info.add_text("Parameters", parameters)
+        options = {**options, "pnginfo": info}
+    
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    
+    temp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        temp_path.write_bytes(buffer.getbuffer())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def read_parameters(path: Path) -> Optional[str]:
+    """
+    Read the generation parameters stored by save_image.
+    
+    Args:
+        path: Saved image
+    
+    Returns:
+        The stored parameters, or None if there are none
+    """
+    from PIL import Image
+    
+    try:
+        with Image.open(path) as image:
+            return getattr(image, "text", {}).get("Parameters")
+    except (OSError, SyntaxError):
+        return None
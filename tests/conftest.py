@@ -0,0 +1,11 @@
+"""Shared test fixtures"""
+
+import pytest
+
+from z_image_gen.config.settings import Settings
+
+
+@pytest.fixture(scope="session")
+def default_settings():
+    """Default Settings, built once (instances are immutable)"""
+    return Settings()
@@ -0,0 +1,83 @@
+"""Tests for the result cache"""
+
+import contextlib
+import os
+
+import pytest
+from PIL import Image
+
+from z_image_gen.core.cache import ResultCache
+
+# Fields in the order ZImageGenerator.generate passes them to ResultCache.key
+KEY_FIELDS = {
+    "model": "z_image_turbo-Q4_K.gguf",
+    "prompt": "a cat",
+    "negative": "",
+    "width": 768,
+    "height": 512,
+    "steps": 4,
+    "seed": 42,
+    "cfg": 0.0,
+    "sampler": "euler_a",
+    "scheduler": "discrete",
+    "render_width": 768,
+    "render_height": 512,
+}
+
+
+class TestResultCache:
+    """Test ResultCache class"""
+    
+    def test_round_trip(self, tmp_path):
+        """Test a stored image is returned for the same key"""
+        cache = ResultCache(1024 * 1024, cache_dir=tmp_path)
+        key = ResultCache.key("q4_k", "a cat", 64, 64, 42)
+        
+        assert cache.get(key) is None
+        
+        cache.put(key, Image.new("RGB", (64, 64), "red"))
+        image = cache.get(key)
+        
+        assert image.size == (64, 64)
+        assert image.getpixel((0, 0)) == (255, 0, 0)
+    
+    @pytest.mark.parametrize("field", KEY_FIELDS)
+    def test_key_depends_on_every_field(self, field):
+        """Test changing any single field changes the key"""
+        changed = dict(KEY_FIELDS)
+        changed[field] = f"{changed[field]}x"
+        
+        assert ResultCache.key(*changed.values()) != ResultCache.key(*KEY_FIELDS.values())
+    
+    def test_evict_skips_vanished_entries(self, tmp_path, monkeypatch):
+        """Test an entry deleted during eviction does not fail put()"""
+        class VanishedEntry:
+            name = "gone.png"
+            path = str(tmp_path / "gone.png")
+            
+            def stat(self):
+                raise FileNotFoundError(self.path)
+        
+        scandir = os.scandir
+        
+        @contextlib.contextmanager
+        def scandir_with_vanished(path):
+            with scandir(path) as it:
+                yield [VanishedEntry(), *it]
+        
+        monkeypatch.setattr(os, "scandir", scandir_with_vanished)
+        cache = ResultCache(1, cache_dir=tmp_path)
+        
+        cache.put(ResultCache.key("a cat"), Image.new("RGB", (8, 8)))
+        
+        assert not any(tmp_path.iterdir())
+    
+    def test_disabled(self, tmp_path):
+        """Test a zero budget stores nothing"""
+        cache = ResultCache(0, cache_dir=tmp_path)
+        key = ResultCache.key("a cat")
+        
+        cache.put(key, Image.new("RGB", (8, 8)))
+        
+        assert cache.get(key) is None
+        assert not any(tmp_path.iterdir())
@@ -0,0 +1,146 @@
+"""Tests for the command line interface"""
+
+import io
+
+from PIL import Image
+
+from z_image_gen.cli import app
+from z_image_gen.config.settings import Settings
+from z_image_gen.utils.console import get_console
+
+
+class FakeGenerator:
+    """Stand-in for ZImageGenerator that renders instantly"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        pass
+    
+    def generate(self, prompt, **kwargs):
+        if prompt == "fail":
+            raise OSError("disk full")
+        return Image.new("RGB", (8, 8))
+
+
+class TestServeMode:
+    """Test the stdin/stdout protocol of --serve"""
+    
+    def test_stdout_has_one_line_per_prompt(self, tmp_path, monkeypatch, capsys):
+        """Test stdout only carries paths and error lines, and failures do not stop the loop"""
+        monkeypatch.setattr(get_console(), "stderr", False)
+        monkeypatch.setattr(app, "create_generator", lambda settings: FakeGenerator())
+        monkeypatch.setattr("sys.stdin", io.StringIO("first\nfail\n\nsecond\n"))
+        settings = Settings(output_dir=tmp_path, filename_template="{timestamp}")
+        
+        assert app.serve_mode(settings) == 1
+        
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 3
+        assert lines[0].startswith(str(tmp_path))
+        assert lines[1] == "error: disk full"
+        assert lines[2].startswith(str(tmp_path))
+
+
+class TestSkipExisting:
+    """Test --skip-existing only keeps outputs of the same request"""
+    
+    def render(self, output, **kwargs):
+        """Render through generate_image with a generator that records calls"""
+        calls = []
+        
+        class Recorder(FakeGenerator):
+            def generate(self, prompt, **kw):
+                calls.append(prompt)
+                return super().generate(prompt, **kw)
+        
+        settings = Settings(output_dir=output.parent, skip_existing=True, **kwargs)
+        app.generate_image(Recorder(), "a cat", settings, seed=42, output=output)
+        return len(calls)
+    
+    def test_same_request_is_skipped(self, tmp_path):
+        """Test an output saved from the same request is kept"""
+        output = tmp_path / "cat.png"
+        assert self.render(output) == 1
+        assert self.render(output) == 0
+    
+    def test_file_without_metadata_is_rendered(self, tmp_path):
+        """Test files without stored parameters are not trusted"""
+        for name in ("cat.png", "cat.jpg"):
+            output = tmp_path / name
+            Image.new("RGB", (8, 8)).save(output)
+            assert self.render(output) == 1
+        
+        output = tmp_path / "plain.png"
+        assert self.render(output, save_metadata=False) == 1
+        assert self.render(output, save_metadata=False) == 1
+    
+    def test_changed_settings_are_rendered(self, tmp_path):
+        """Test a different request replaces the existing output"""
+        output = tmp_path / "cat.png"
+        assert self.render(output) == 1
+        assert self.render(output, steps=8) == 1
+    
+    def test_describe_request_fields(self):
+        """Test the negative prompt and format are part of the request"""
+        settings = Settings()
+        base = app.describe_request("a cat", 42, settings)
+        
+        assert app.describe_request("a cat", 42, settings, negative_prompt="dog") != base
+        assert app.describe_request("a cat", 42, settings, image_format="webp") != base
+
+
+class TestModelCommands:
+    """Test model commands report download failures"""
+    
+    def test_verify_model_download_error(self, tmp_path, monkeypatch, capsys):
+        """Test a failed re-download prints a message and exits with 1"""
+        from z_image_gen.core import model
+        from z_image_gen.core.model import ModelManager, DownloadError
+        
+        def fail(self):
+            raise DownloadError("connection refused")
+        
+        # Keep the real model cache out of reach of delete()
+        monkeypatch.setattr(model, "get_model_cache_path", lambda: tmp_path)
+        monkeypatch.setattr(ModelManager, "verify", lambda self, force=False: False)
+        monkeypatch.setattr(ModelManager, "delete", lambda self: None)
+        monkeypatch.setattr(ModelManager, "download", fail)
+        args = app.build_parser().parse_args(["--verify-model"])
+        
+        assert app.run_verify_model(args) == 1
+        assert "Download error: connection refused" in capsys.readouterr().out
+    
+    def test_download_model_interrupted(self, tmp_path, monkeypatch):
+        """Test an interrupted download exits with 1 instead of raising"""
+        from z_image_gen.core import model
+        from z_image_gen.core.model import ModelManager
+        
+        def interrupt(self):
+            raise KeyboardInterrupt
+        
+        monkeypatch.setattr(model, "get_model_cache_path", lambda: tmp_path)
+        monkeypatch.setattr(ModelManager, "is_downloaded", lambda self: False)
+        monkeypatch.setattr(ModelManager, "download", interrupt)
+        args = app.build_parser().parse_args(["--download-model"])
+        
+        assert app.run_download_model(args) == 1
+    
+    def test_verify_model_checks_every_download(self, tmp_path, monkeypatch, capsys):
+        """Test --verify-model covers all downloaded models, not just --model"""
+        import hashlib
+        from z_image_gen.core import model
+        
+        monkeypatch.setattr(model, "get_model_cache_path", lambda: tmp_path)
+        for model_type in ("q4_k", "q8_0"):
+            manager = model.ModelManager(model_type)
+            data = model_type.encode() * 1000
+            manager.model_path.write_bytes(data)
+            manager.checksum_path.write_text(hashlib.sha256(data).hexdigest())
+        args = app.build_parser().parse_args(["--verify-model"])
+        
+        assert app.run_verify_model(args) == 0
+        out = capsys.readouterr().out.replace("\n", "")
+        assert "z_image_turbo-Q4_K.gguf" in out
+        assert "z_image_turbo-Q8_0.gguf" in out
@@ -1,6 +1,7 @@
 """Tests for configuration module"""
 
 import pytest
+from dataclasses import replace
 from pathlib import Path
 
 from z_image_gen.config.settings import Settings
@@ -10,11 +11,11 @@ from z_image_gen.config.paths import get_downloads_folder, get_model_cache_path
 class TestSettings:
     """Test Settings class"""
     
-    def test_default_settings(self):
+    def test_default_settings(self, default_settings):
         """Test default settings creation"""
-        settings = Settings()
+        settings = default_settings
         
-        assert settings.model_type == "q4_0"
+        assert settings.model_type == "q4_k"
         assert settings.width == 768
         assert settings.height == 512
         assert settings.steps == 4
@@ -35,16 +36,16 @@ class TestSettings:
         assert settings.height == 576
         assert settings.steps == 8
     
-    def test_output_dir_resolution(self):
+    def test_output_dir_resolution(self, default_settings):
         """Test output directory resolution"""
-        settings = Settings()
+        settings = default_settings
         
         assert settings.output_dir is not None
         assert isinstance(settings.output_dir, Path)
     
-    def test_get_output_path(self):
+    def test_get_output_path(self, default_settings):
         """Test output path generation"""
-        settings = Settings()
+        settings = default_settings
         
         path = settings.get_output_path(seed=42)
         
@@ -52,17 +53,38 @@ class TestSettings:
         assert "zimage_42_" in path.name
         assert path.suffix == ".png"
     
+    def test_get_output_path_format(self):
+        """Test output path follows the image format"""
+        settings = Settings(image_format="webp")
+        
+        path = settings.get_output_path(seed=42)
+        
+        assert path.suffix == ".webp"
+    
+    def test_get_output_path_template(self):
+        """Test custom filename templates, including format specs"""
+        settings = Settings(filename_template="img_{seed:05d}")
+        assert settings.get_output_path(seed=42).name == "img_00042.png"
+        
+        settings = replace(settings, filename_template="{timestamp}-{seed}")
+        assert settings.get_output_path(timestamp="T").name == "T-random.png"
+    
     def test_from_env(self, monkeypatch):
         """Test settings from environment variables"""
         monkeypatch.setenv("Z_IMAGE_WIDTH", "1024")
         monkeypatch.setenv("Z_IMAGE_HEIGHT", "576")
         monkeypatch.setenv("Z_IMAGE_STEPS", "8")
+        Settings.from_env.cache_clear()
         
-        settings = Settings.from_env()
-        
-        assert settings.width == 1024
-        assert settings.height == 576
-        assert settings.steps == 8
+        try:
+            settings = Settings.from_env()
+            
+            assert settings.width == 1024
+            assert settings.height == 576
+            assert settings.steps == 8
+        finally:
+            # Later tests must not see the settings built from these variables
+            Settings.from_env.cache_clear()
 
 
 class TestPaths:
@@ -75,6 +97,16 @@ class TestPaths:
         assert isinstance(path, Path)
         assert path.exists() or path.parent.exists()  # May not exist yet
     
+    def test_get_downloads_folder_override(self, monkeypatch, tmp_path):
+        """Test Z_IMAGE_OUTPUT_DIR overrides the downloads lookup"""
+        monkeypatch.setenv("Z_IMAGE_OUTPUT_DIR", str(tmp_path))
+        get_downloads_folder.cache_clear()
+        
+        try:
+            assert get_downloads_folder() == tmp_path
+        finally:
+            get_downloads_folder.cache_clear()
+    
     def test_get_model_cache_path(self):
         """Test model cache path resolution"""
         path = get_model_cache_path()
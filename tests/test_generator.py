@@ -0,0 +1,35 @@
+"""Tests for generator helpers"""
+
+import pytest
+
+from z_image_gen.core.generator import render_size, SIZE_MULTIPLE, BASE_MAX_PIXELS
+
+
+class TestRenderSize:
+    """Test render size reduction for the VRAM budget"""
+    
+    def test_within_budget_is_kept(self):
+        """Test sizes that fit are rendered as requested"""
+        assert render_size(768, 512, BASE_MAX_PIXELS) == (768, 512)
+        assert render_size(1000, 1000, None) == (1000, 1000)
+    
+    @pytest.mark.parametrize("width, height", [
+        (1024, 1024),
+        (1920, 1080),
+        (1080, 1920),
+        (4096, 64),
+        (64, 4096),
+        (20000, 100),
+        (100, 20000),
+    ])
+    def test_reduced_size_fits_budget(self, width, height):
+        """Test reduced sizes stay in budget and on the size grid, including extreme ratios"""
+        max_pixels = BASE_MAX_PIXELS // 4
+        
+        render_width, render_height = render_size(width, height, max_pixels)
+        
+        assert render_width * render_height <= max_pixels
+        assert render_width % SIZE_MULTIPLE == 0
+        assert render_height % SIZE_MULTIPLE == 0
+        # Orientation is preserved
+        assert (render_width >= render_height) == (width >= height)
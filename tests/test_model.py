@@ -0,0 +1,85 @@
+"""Tests for model management"""
+
+import hashlib
+import os
+
+import pytest
+
+from z_image_gen.core.model import ModelManager, MODELS, DEFAULT_MODEL, verify_many
+
+
+class TestModelManager:
+    """Test ModelManager class"""
+    
+    def test_default_model(self, tmp_path):
+        """Test default model selection"""
+        manager = ModelManager(cache_dir=tmp_path)
+        
+        assert manager.model_type == DEFAULT_MODEL
+        assert manager.model_info is MODELS[DEFAULT_MODEL]
+        assert manager.model_path.parent == tmp_path
+    
+    def test_unknown_model(self, tmp_path):
+        """Test unknown model type is rejected"""
+        with pytest.raises(ValueError):
+            ModelManager("q1_0", cache_dir=tmp_path)
+    
+    def test_is_downloaded(self, tmp_path):
+        """Test download detection"""
+        manager = ModelManager(cache_dir=tmp_path)
+        assert not manager.is_downloaded()
+        
+        manager.model_path.write_bytes(b"gguf")
+        assert manager.is_downloaded()
+    
+    def test_verify_with_recorded_checksum(self, tmp_path):
+        """Test verification against the checksum recorded at download"""
+        manager = ModelManager(cache_dir=tmp_path)
+        data = b"model weights" * 1000
+        manager.model_path.write_bytes(data)
+        manager.checksum_path.write_text(hashlib.sha256(data).hexdigest())
+        
+        assert manager.verify()
+        
+        manager.model_path.write_bytes(data[:-1])
+        assert not manager.verify()
+    
+    def test_verify_skips_unchanged_file(self, tmp_path):
+        """Test a verified model is trusted until its size or mtime changes"""
+        manager = ModelManager(cache_dir=tmp_path)
+        data = b"model weights" * 1000
+        manager.model_path.write_bytes(data)
+        manager.checksum_path.write_text(hashlib.sha256(data).hexdigest())
+        assert manager.verify()
+        assert manager.verified_path.exists()
+        
+        # Same size and mtime: the recorded result is reused
+        stat = manager.model_path.stat()
+        manager.model_path.write_bytes(data.upper())
+        os.utime(manager.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert manager.verify()
+        
+        # Touching the file invalidates the record
+        os.utime(manager.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert not manager.verify()
+    
+    def test_delete_removes_sidecars(self, tmp_path):
+        """Test delete cleans up partial download state"""
+        manager = ModelManager(cache_dir=tmp_path)
+        for path in (manager.model_path, manager.temp_path, manager.state_path, manager.checksum_path, manager.verified_path):
+            path.write_bytes(b"x")
+        
+        manager.delete()
+        
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_verify_many(self, tmp_path):
+        """Test parallel verification keeps results in order"""
+        managers = [ModelManager(key, cache_dir=tmp_path) for key in ("q4_k", "q5_k", "q8_0")]
+        for index, manager in enumerate(managers):
+            data = bytes([index]) * 4096
+            manager.model_path.write_bytes(data)
+            manager.checksum_path.write_text(hashlib.sha256(data).hexdigest())
+        managers[1].model_path.write_bytes(b"corrupt")
+        
+        assert verify_many(managers) == [True, False, True]